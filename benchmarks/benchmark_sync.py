@@ -0,0 +1,475 @@
+import argparse
+import contextlib
+import datetime
+import http.server
+import importlib
+import json
+import logging
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+SRC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+SCENARIOS = ["nothing_new", "new_videos", "cleanup"]
+METADATA_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def mp4_atom(name, data):
+    return struct.pack(">I4s", 8 + len(data), name) + data
+
+
+def mp4_text_tag(name, text):
+    return mp4_atom(name, mp4_atom(b"data", struct.pack(">II", 1, 0) + text.encode("utf-8")))
+
+
+def build_media_file(media_type, payload_size, tags=None):
+    brand = b"M4A " if media_type == "Audio" else b"isom"
+    movie_header = mp4_atom(b"mvhd", b"\0" * 4 + struct.pack(">IIII", 0, 0, 1000, 600000) + b"\0" * 80)
+    if tags:
+        tag_list = mp4_atom(b"ilst", b"".join(mp4_text_tag(name, value) for name, value in tags.items()))
+        handler = mp4_atom(b"hdlr", b"\0" * 8 + b"mdirappl" + b"\0" * 10)
+        movie_header += mp4_atom(b"udta", mp4_atom(b"meta", b"\0" * 4 + handler + tag_list))
+    return mp4_atom(b"ftyp", brand + b"\0\0\0\0" + brand + b"mp42") + mp4_atom(b"moov", movie_header) + mp4_atom(b"mdat", b"\0" * payload_size)
+
+
+def read_thread_io():
+    try:
+        with open("/proc/thread-self/io", "r") as io_file:
+            counters = dict(line.split(": ") for line in io_file.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+class FakeYoutube:
+    def __init__(self, latency_seconds, rate_limit, seed, page_size=100):
+        self.latency_seconds = latency_seconds
+        self.rate_limit = rate_limit
+        self.page_size = page_size
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.channels_by_link = {}
+        self.channels_by_id = {}
+        self.videos = {}
+        self.requests = {}
+        self.rate_limited = 0
+        self.bytes_downloaded = 0
+        self.payload_size = 0
+
+    def add_channel(self, index, upload_ages_hours, media_type="Video"):
+        channel_name = f"Bench Channel {index:05d}"
+        channel_id = f"UCbench{index:05d}".ljust(24, "x")
+        current_time = time.time()
+        videos = []
+        for video_index, age_hours in enumerate(sorted(upload_ages_hours)):
+            timestamp = current_time - age_hours * 3600
+            video = {
+                "id": f"{index:05d}v{video_index:05d}",
+                "title": f"{channel_name} Video {video_index:05d}",
+                "timestamp": timestamp,
+                "upload_date": datetime.datetime.fromtimestamp(timestamp).strftime("%Y%m%d"),
+            }
+            videos.append(video)
+            self.videos[video["id"]] = video
+
+        channel = {
+            "Id": index,
+            "Name": channel_name,
+            "Link": f"https://www.youtube.com/@bench{index:05d}",
+            "DL_Days": 7,
+            "Keep_Days": 28,
+            "Last_Synced": "Never",
+            "Item_Count": 0,
+            "Filter_Title_Text": "",
+            "Negate_Filter": False,
+            "Media_Type": media_type,
+            "Search_Limit": "",
+            "Live_Rule": "Ignore",
+            "Channel_Id": channel_id,
+            "Channel_Title": channel_name,
+            "Sync_Schedule": "",
+            "videos": videos,
+        }
+        self.channels_by_link[channel["Link"]] = channel
+        self.channels_by_id[channel_id] = channel
+        return channel
+
+    def request(self, kind):
+        time.sleep(self.latency_seconds)
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            rate_limited = self.random.random() < self.rate_limit
+            if rate_limited:
+                self.rate_limited += 1
+        return rate_limited
+
+    def extract_info(self, ydl, url, download, process):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        if "v" in query:
+            kind = "video"
+        elif "list" in query:
+            kind = "playlist"
+        else:
+            kind = "channel"
+
+        if self.request(kind):
+            raise ydl.rate_limit_error(f"ERROR: [youtube] {url}: HTTP Error 429: Too Many Requests")
+
+        if kind == "channel":
+            channel = self.channels_by_link[url]
+            return {"id": channel["Channel_Id"], "channel_id": channel["Channel_Id"], "title": channel["Name"], "channel": channel["Name"]}
+
+        if kind == "playlist":
+            channel = self.channels_by_id[f'UC{query["list"][0][2:]}']
+            playlist_entries = self.iterate_playlist(ydl, channel)
+            return {
+                "_type": "playlist",
+                "id": query["list"][0],
+                "title": f'Uploads from {channel["Name"]}',
+                "channel": channel["Name"],
+                "channel_id": channel["Channel_Id"],
+                "entries": playlist_entries if not process else list(playlist_entries),
+            }
+
+        video = self.videos[query["v"][0]]
+        video_info = {
+            "id": video["id"],
+            "title": video["title"],
+            "upload_date": video["upload_date"],
+            "timestamp": video["timestamp"],
+            "live_status": "not_live",
+            "duration": 600,
+            "filesize_approx": self.payload_size,
+        }
+        return self.download(ydl, video_info) if download else video_info
+
+    def iterate_playlist(self, ydl, channel):
+        for position, video in enumerate(channel["videos"]):
+            if position and position % self.page_size == 0 and self.request("playlist_page"):
+                raise ydl.rate_limit_error(f'ERROR: [youtube:tab] {channel["Channel_Id"]}: HTTP Error 429: Too Many Requests')
+            yield {
+                "id": video["id"],
+                "title": video["title"],
+                "url": f'https://www.youtube.com/watch?v={video["id"]}',
+                "duration": 600,
+                "live_status": None,
+                "timestamp": video["timestamp"],
+            }
+
+    def download(self, ydl, video):
+        if self.request("download"):
+            raise ydl.rate_limit_error(f'ERROR: [download] {video["id"]}: HTTP Error 429: Too Many Requests')
+
+        media_type = "Video" if ydl.params.get("merge_output_format") else "Audio"
+        file_ext = "mp4" if media_type == "Video" else "m4a"
+        file_path = os.path.join(ydl.params["paths"]["home"], ydl.params["outtmpl"]["default"] % {"ext": file_ext})
+        file_content = build_media_file(media_type, self.payload_size)
+        with open(file_path, "wb") as media_file:
+            media_file.write(file_content)
+        with self.lock:
+            self.bytes_downloaded += len(file_content)
+        return {"id": video["id"], "title": video["title"], "ext": file_ext, "requested_downloads": [{"id": video["id"], "ext": file_ext, "filepath": file_path}]}
+
+
+class FeedServer:
+    def __init__(self, fake_youtube):
+        self.fake_youtube = fake_youtube
+        self.responses = {}
+        self.lock = threading.Lock()
+        feed_server = self
+
+        class FeedRequestHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                feed_server.handle_feed_request(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FeedRequestHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/feeds/videos.xml"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle_feed_request(self, handler):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(handler.path).query)
+        channel = self.fake_youtube.channels_by_id.get(query.get("channel_id", [""])[0])
+        newest_video_id = channel["videos"][0]["id"] if channel and channel["videos"] else ""
+        etag = f'"{newest_video_id}"'
+
+        if self.fake_youtube.request("feed"):
+            status, body = 429, b""
+        elif channel is None:
+            status, body = 404, b""
+        elif handler.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        else:
+            status, body = 200, f"<feed><entry><yt:videoId>{newest_video_id}</yt:videoId></entry></feed>".encode("utf-8")
+
+        with self.lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+        handler.send_response(status)
+        if status in (200, 304):
+            handler.send_header("ETag", etag)
+        if status != 304:
+            handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class StageRecorder:
+    def __init__(self, time_stage):
+        self.time_stage = time_stage
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage, **span_args):
+        read_before, written_before = read_thread_io()
+        started_at = time.perf_counter()
+        try:
+            with self.time_stage(stage, **span_args):
+                yield
+
+        finally:
+            elapsed_seconds = time.perf_counter() - started_at
+            read_after, written_after = read_thread_io()
+            with self.lock:
+                stage_totals = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "bytes_read": 0, "bytes_written": 0})
+                stage_totals["count"] += 1
+                stage_totals["seconds"] += elapsed_seconds
+                stage_totals["bytes_read"] += read_after - read_before
+                stage_totals["bytes_written"] += written_after - written_before
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+
+
+class BenchmarkRun:
+    def __init__(self, args):
+        self.args = args
+        self.fake_youtube = FakeYoutube(args.latency_ms / 1000, args.rate_limit, args.seed)
+        self.fake_youtube.payload_size = args.media_kb * 1024
+        self.results = []
+
+    def setup(self):
+        self.previous_folder = os.getcwd()
+        self.workspace = tempfile.mkdtemp(prefix="channeltube-benchmark-")
+        os.chdir(self.workspace)
+        self.feed_server = FeedServer(self.fake_youtube)
+        os.environ["youtube_feed_url"] = self.feed_server.url
+
+        if not self.args.verbose:
+            logging.disable(logging.ERROR)
+        sys.path.insert(0, SRC_FOLDER)
+        self.ct = importlib.import_module("ChannelTube")
+
+        fake_youtube = self.fake_youtube
+
+        class FakeYoutubeDL(self.ct.yt_dlp.YoutubeDL):
+            rate_limit_error = self.ct.yt_dlp.utils.DownloadError
+
+            def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True, force_generic_extractor=False):
+                return fake_youtube.extract_info(self, url, download, process)
+
+            def process_ie_result(self, ie_result, download=True, extra_info=None):
+                return fake_youtube.download(self, ie_result) if download else ie_result
+
+        self.ct.yt_dlp.YoutubeDL = FakeYoutubeDL
+        self.data_handler = self.ct.data_handler
+        for media_type in ["Video", "Audio"]:
+            postprocess_options = dict(self.data_handler.get_postprocess_options(media_type))
+            postprocess_options["postprocessors"] = []
+            self.data_handler.youtube_dl_pool.register_profile(f"{media_type}_postprocess", postprocess_options)
+
+        self.stage_recorder = StageRecorder(self.ct.metrics.time_stage)
+        self.ct.metrics.time_stage = self.stage_recorder.measure
+
+    def teardown(self):
+        os.chdir(self.previous_folder)
+        if self.args.keep_workspace:
+            print(f"Workspace kept at {self.workspace}", file=sys.stderr)
+        else:
+            shutil.rmtree(self.workspace, ignore_errors=True)
+
+    def create_library(self, channel, videos, downloaded_at):
+        channel_folder_path = self.data_handler.get_channel_folder_path(channel)
+        os.makedirs(channel_folder_path, exist_ok=True)
+        file_ext = ".mp4" if channel["Media_Type"] == "Video" else ".m4a"
+        for video in videos:
+            file_path = os.path.join(channel_folder_path, f'{self.data_handler.string_cleaner(video["title"])}{file_ext}')
+            tags = {
+                b"\xa9day": datetime.datetime.fromtimestamp(downloaded_at or video["timestamp"]).strftime(METADATA_TIMESTAMP_FORMAT),
+                b"\xa9cmt": video["id"],
+                b"\xa9nam": video["title"],
+            }
+            with open(file_path, "wb") as media_file:
+                media_file.write(build_media_file(channel["Media_Type"], self.args.library_kb * 1024, tags))
+            os.utime(file_path, (downloaded_at or video["timestamp"],) * 2)
+
+    def set_channels(self, channels):
+        channel_records = [{key: value for key, value in channel.items() if key != "videos"} for channel in channels]
+        self.data_handler.config_store.insert_channels(channel_records)
+        self.data_handler.load_channel_list()
+
+    def run_phase(self, scenario, phase):
+        request_counts_before = dict(self.fake_youtube.requests)
+        feed_responses_before = dict(self.feed_server.responses)
+        rate_limited_before = self.fake_youtube.rate_limited
+        bytes_downloaded_before = self.fake_youtube.bytes_downloaded
+        files_parsed_before = self.data_handler.media_index.files_parsed
+        self.stage_recorder.reset()
+
+        started_at = time.perf_counter()
+        self.data_handler.master_queue()
+        wall_seconds = time.perf_counter() - started_at
+
+        request_counts = {kind: count - request_counts_before.get(kind, 0) for kind, count in self.fake_youtube.requests.items()}
+        feed_responses = {str(status): count - feed_responses_before.get(status, 0) for status, count in self.feed_server.responses.items()}
+        self.results.append(
+            {
+                "scenario": scenario,
+                "phase": phase,
+                "wall_seconds": wall_seconds,
+                "requests": {kind: count for kind, count in sorted(request_counts.items()) if count},
+                "feed_responses": {status: count for status, count in sorted(feed_responses.items()) if count},
+                "rate_limited": self.fake_youtube.rate_limited - rate_limited_before,
+                "files_parsed": self.data_handler.media_index.files_parsed - files_parsed_before,
+                "bytes_downloaded": self.fake_youtube.bytes_downloaded - bytes_downloaded_before,
+                "channel_states": self.count_channel_states(),
+                "stages": dict(sorted(self.stage_recorder.stages.items())),
+            }
+        )
+
+    def count_channel_states(self):
+        channel_states = {}
+        for channel in self.data_handler.req_channel_list:
+            channel_state = channel["Last_Synced"] if channel["Last_Synced"] in ("Failed", "Never") else "Synced"
+            channel_states[channel_state] = channel_states.get(channel_state, 0) + 1
+        return channel_states
+
+    def run_nothing_new(self):
+        channels = []
+        for index in range(self.args.channels):
+            channel = self.fake_youtube.add_channel(index, [12 + 12 * video_index for video_index in range(30)])
+            self.create_library(channel, channel["videos"], None)
+            channels.append(channel)
+
+        self.set_channels(channels)
+        self.run_phase("nothing_new", "cold")
+        self.run_phase("nothing_new", "warm")
+        self.run_phase("nothing_new", "steady")
+
+    def run_new_videos(self):
+        upload_ages_hours = [12 + 2 * video_index for video_index in range(self.args.new_videos)]
+        upload_ages_hours += [24 * 30 + 24 * video_index for video_index in range(20)]
+        channel = self.fake_youtube.add_channel(0, upload_ages_hours)
+        channel["DL_Days"] = 14
+        self.set_channels([channel])
+        self.run_phase("new_videos", "sync")
+
+    def run_cleanup(self):
+        channel = self.fake_youtube.add_channel(0, [24 * 30 + 24 * video_index for video_index in range(5)])
+        downloaded_at = time.time() - 60 * 86400
+        library_videos = [{"id": f"old{index:08d}", "title": f'{channel["Name"]} Archive {index:05d}', "timestamp": downloaded_at} for index in range(self.args.cleanup_files)]
+        self.create_library(channel, library_videos, downloaded_at)
+        self.set_channels([channel])
+        self.run_phase("cleanup", "sync")
+
+
+def format_bytes(byte_count):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(byte_count) < 1024 or unit == "GiB":
+            return f"{byte_count:.0f} {unit}" if unit == "B" else f"{byte_count:.1f} {unit}"
+        byte_count /= 1024
+
+
+def print_report(results):
+    for result in results:
+        print(f'== {result["scenario"]} / {result["phase"]} ==')
+        print(f'wall time:        {result["wall_seconds"]:.2f} s')
+        print(f'requests:         {", ".join(f"{kind}={count}" for kind, count in result["requests"].items()) or "none"}')
+        print(f'feed responses:   {", ".join(f"{status}={count}" for status, count in result["feed_responses"].items()) or "none"}')
+        print(f'rate limited:     {result["rate_limited"]}')
+        print(f'files parsed:     {result["files_parsed"]}')
+        print(f'downloaded:       {format_bytes(result["bytes_downloaded"])}')
+        print(f'channels:         {", ".join(f"{state}={count}" for state, count in result["channel_states"].items())}')
+        print(f'{"stage":<22}{"count":>8}{"seconds":>12}{"read":>14}{"written":>14}')
+        for stage, stage_totals in result["stages"].items():
+            print(f'{stage:<22}{stage_totals["count"]:>8}{stage_totals["seconds"]:>12.3f}{format_bytes(stage_totals["bytes_read"]):>14}{format_bytes(stage_totals["bytes_written"]):>14}')
+        print()
+
+
+def run_scenario(args):
+    benchmark_run = BenchmarkRun(args)
+    try:
+        benchmark_run.setup()
+        getattr(benchmark_run, f"run_{args.run_scenario}")()
+
+    finally:
+        benchmark_run.teardown()
+    print(json.dumps(benchmark_run.results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ChannelTube sync benchmark using a fake YouTube extractor and a synthetic library.")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated latency of every YouTube request.")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of YouTube requests answered with HTTP 429.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--channels", type=int, default=400, help="Channels in the nothing_new scenario.")
+    parser.add_argument("--new-videos", type=int, default=50, help="New videos in the new_videos scenario.")
+    parser.add_argument("--cleanup-files", type=int, default=10000, help="Expired files in the cleanup scenario.")
+    parser.add_argument("--media-kb", type=int, default=256, help="Size of each fake download.")
+    parser.add_argument("--library-kb", type=int, default=4, help="Size of each synthetic library file.")
+    parser.add_argument("--json", help="Also write the raw results to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Show ChannelTube log output.")
+    parser.add_argument("--keep-workspace", action="store_true", help="Keep the temporary library and config folders for inspection.")
+    parser.add_argument("--run-scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        run_scenario(args)
+        return
+
+    results = []
+    forwarded_args = [
+        f"--latency-ms={args.latency_ms}",
+        f"--rate-limit={args.rate_limit}",
+        f"--seed={args.seed}",
+        f"--channels={args.channels}",
+        f"--new-videos={args.new_videos}",
+        f"--cleanup-files={args.cleanup_files}",
+        f"--media-kb={args.media_kb}",
+        f"--library-kb={args.library_kb}",
+    ]
+    if args.verbose:
+        forwarded_args.append("--verbose")
+    if args.keep_workspace:
+        forwarded_args.append("--keep-workspace")
+    for scenario in SCENARIOS if args.scenario == "all" else [args.scenario]:
+        completed_process = subprocess.run([sys.executable, os.path.abspath(__file__), *forwarded_args, "--run-scenario", scenario], stdout=subprocess.PIPE, text=True)
+        if completed_process.returncode != 0:
+            sys.exit(f"Scenario {scenario} failed with exit code {completed_process.returncode}")
+        results.extend(json.loads(completed_process.stdout.strip().splitlines()[-1]))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
+import collections
 import concurrent.futures
+import contextlib
+import copy
 import datetime
+import errno
+import fcntl
+import functools
+import hashlib
+import itertools
 import json
 import logging
+import math
 import os
 import re
-import tempfile
+import sqlite3
+import shutil
+import stat
 import threading
 import time
+import urllib.parse
+import zlib
 
 import requests
 import yt_dlp
-from flask import Flask, render_template
+from flask import Flask, Response, render_template, request
 from flask_socketio import SocketIO
 from mutagen.mp4 import MP4
 from plexapi.server import PlexServer
@@ -19,6 +32,1397 @@ PERMANENT_RETENTION = -1
 VIDEO_EXTENSIONS = {".mp4"}
 AUDIO_EXTENSIONS = {".m4a"}
 MEDIA_FILE_EXTENSIONS = VIDEO_EXTENSIONS.union(AUDIO_EXTENSIONS)
+FICLONE_IOCTL = 0x40049409
+SUBTITLE_LANGUAGE_PATTERN = re.compile(r"^[A-Za-z]{2,3}(?:[-_][A-Za-z0-9]+)*$")
+METADATA_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+FFMPEG_METADATA_KEYS = {"\xa9day": "date", "\xa9cmt": "comment", "\xa9nam": "title", "\xa9ART": "artist", "\xa9gen": "genre"}
+IN_PLACE_TAG_REWRITE_LIMIT = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=256)
+def compile_title_filter(filter_text):
+    filter_text = filter_text.strip()
+    if len(filter_text) > 2 and filter_text.startswith("/") and filter_text.endswith("/"):
+        try:
+            return re.compile(filter_text[1:-1], re.IGNORECASE)
+        except re.error as e:
+            logging.getLogger().error(f"Invalid title filter regex {filter_text}: {e}, matching it as plain text")
+
+    filter_terms = [term.strip() for term in filter_text.split(";") if term.strip()]
+    if not filter_terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in filter_terms), re.IGNORECASE)
+
+
+class CronExpression:
+    field_ranges = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression}")
+
+        self.expression = " ".join(fields)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [self.parse_field(field, low, high) for field, (low, high) in zip(fields, self.field_ranges)]
+        self.weekdays = {0 if weekday == 7 else weekday for weekday in self.weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def parse_field(field, low, high):
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step: {field}")
+
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field out of range: {field}")
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def day_matches(self, candidate):
+        day_match = candidate.day in self.days
+        weekday_match = (candidate.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_run_time(self, after):
+        candidate = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = candidate + datetime.timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+                continue
+            if not self.day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+                continue
+            return candidate
+
+        return None
+
+
+def is_cron_expression(text):
+    fields = text.split()
+    return len(fields) == 5 and all(re.fullmatch(r"[\d*/,\-]+", field) and not field.startswith(",") and not field.endswith(",") for field in fields)
+
+
+def parse_sync_schedule(schedule_text):
+    hour_entries = set()
+    other_entries = []
+
+    for part in schedule_text.split(";"):
+        part = part.strip()
+        if not part:
+            continue
+
+        if is_cron_expression(part):
+            cron_expression = CronExpression(part).expression
+            if cron_expression not in other_entries:
+                other_entries.append(cron_expression)
+            continue
+
+        for start_time in part.split(","):
+            start_time = start_time.strip()
+            if not start_time:
+                continue
+
+            if ":" in start_time:
+                hour_text, minute_text = start_time.split(":", 1)
+                hour, minute = int(re.sub(r"\D", "", hour_text)), int(re.sub(r"\D", "", minute_text))
+                if not (0 <= hour <= 23 and 0 <= minute <= 59):
+                    raise ValueError(f"Invalid start time: {start_time}")
+                entry = f"{hour:02d}:{minute:02d}"
+                if entry not in other_entries:
+                    other_entries.append(entry)
+            else:
+                hour = int(re.sub(r"\D", "", start_time))
+                hour_entries.add(0 if hour < 0 or hour > 23 else hour)
+
+    return sorted(hour_entries) + other_entries
+
+
+def format_sync_schedule(schedule_entries):
+    start_times = [str(entry) for entry in schedule_entries if not is_cron_expression(str(entry))]
+    cron_expressions = [str(entry) for entry in schedule_entries if is_cron_expression(str(entry))]
+    return "; ".join(([", ".join(start_times)] if start_times else []) + cron_expressions)
+
+
+def build_cron_expressions(schedule_entries):
+    cron_expressions = []
+    for entry in schedule_entries:
+        entry = str(entry)
+        if is_cron_expression(entry):
+            cron_expressions.append(CronExpression(entry))
+        elif ":" in entry:
+            hour, minute = entry.split(":", 1)
+            cron_expressions.append(CronExpression(f"{int(minute)} {int(hour)} * * *"))
+        else:
+            cron_expressions.append(CronExpression(f"0 {int(entry)} * * *"))
+    return cron_expressions
+
+
+class SyncTracer:
+    def __init__(self, max_events=200000):
+        self.lock = threading.Lock()
+        self.max_events = max_events
+        self.general_logger = logging.getLogger()
+        self.enabled = False
+        self.trace_folder = None
+        self.retention = 10
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.events = None
+        self.trace_name = None
+        self.active_syncs = 0
+        self.named_threads = set()
+        self.open_events = collections.defaultdict(list)
+        self.dropped_events = 0
+
+    def configure(self, trace_folder, retention, enabled):
+        with self.lock:
+            self.trace_folder = trace_folder
+            self.retention = retention
+            self.enabled = enabled
+
+    def start_trace(self, trace_name):
+        with self.lock:
+            self.active_syncs += 1
+            if self.events is not None or not self.enabled:
+                return
+            self.events = []
+            self.named_threads = set()
+            self.open_events = collections.defaultdict(list)
+            self.dropped_events = 0
+            self.origin = time.perf_counter()
+            self.trace_name = f'{trace_name}-{datetime.datetime.now().strftime("%Y%m%d-%H%M%S")}'
+
+    def finish_trace(self):
+        with self.lock:
+            self.active_syncs -= 1
+            if self.active_syncs > 0 or self.events is None:
+                return
+            events = self.events
+            trace_name = self.trace_name
+            dropped_events = self.dropped_events
+            self.events = None
+
+        try:
+            os.makedirs(self.trace_folder, exist_ok=True)
+            trace_path = os.path.join(self.trace_folder, f"{trace_name}.json")
+            with open(trace_path, "w") as trace_file:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": dropped_events}}, trace_file)
+            self.general_logger.warning(f"Sync trace written to: {trace_path} ({len(events)} events)")
+            self.remove_old_traces()
+
+        except Exception as e:
+            self.general_logger.error(f"Error writing sync trace: {str(e)}")
+
+    def remove_old_traces(self):
+        trace_paths = [os.path.join(self.trace_folder, filename) for filename in os.listdir(self.trace_folder) if filename.endswith(".json")]
+        trace_paths.sort(key=os.path.getmtime, reverse=True)
+        for trace_path in trace_paths[self.retention :]:
+            os.remove(trace_path)
+
+    def get_timestamp(self):
+        return (time.perf_counter() - self.origin) * 1000000
+
+    def add_event(self, event):
+        current_thread = threading.current_thread()
+        with self.lock:
+            if self.events is None:
+                return
+            if len(self.events) >= self.max_events:
+                self.dropped_events += 1
+                return
+            if current_thread.ident not in self.named_threads:
+                self.named_threads.add(current_thread.ident)
+                self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": current_thread.ident, "args": {"name": current_thread.name}})
+            event.update({"pid": self.pid, "tid": current_thread.ident})
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category="sync", **span_args):
+        if self.events is None:
+            yield
+            return
+
+        start_timestamp = self.get_timestamp()
+        try:
+            yield
+
+        finally:
+            self.add_event({"name": name, "cat": category, "ph": "X", "ts": start_timestamp, "dur": self.get_timestamp() - start_timestamp, "args": span_args})
+
+    def begin(self, name, category="sync", **span_args):
+        if self.events is not None:
+            with self.lock:
+                self.open_events[threading.get_ident()].append((name, category))
+            self.add_event({"name": name, "cat": category, "ph": "B", "ts": self.get_timestamp(), "args": span_args})
+
+    def end(self, name, category="sync"):
+        if self.events is not None:
+            with self.lock:
+                open_events = self.open_events[threading.get_ident()]
+                if (name, category) in open_events:
+                    del open_events[len(open_events) - 1 - open_events[::-1].index((name, category))]
+            self.add_event({"name": name, "cat": category, "ph": "E", "ts": self.get_timestamp()})
+
+    def end_open_events(self):
+        with self.lock:
+            open_events = self.open_events.pop(threading.get_ident(), [])
+        for name, category in reversed(open_events):
+            self.end(name, category)
+
+
+class Metrics:
+    default_buckets = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+    http_status_pattern = re.compile(r"HTTP Error (\d{3})|^\((\d{3})\)|^(\d{3}) (?:Client|Server) Error")
+
+    def __init__(self, tracer=None):
+        self.lock = threading.Lock()
+        self.tracer = tracer
+        self.descriptions = {}
+        self.values = collections.defaultdict(float)
+        self.histograms = {}
+        self.collectors = []
+        self.describe("channeltube_stage_duration_seconds", "histogram", "Time spent in each sync stage.")
+        self.describe("channeltube_stage_active", "gauge", "Number of workers currently running each sync stage.")
+        self.describe("channeltube_http_errors_total", "counter", "HTTP errors seen by source and status class.")
+
+    def describe(self, name, metric_type, help_text, buckets=None):
+        self.descriptions[name] = (metric_type, help_text, buckets or self.default_buckets)
+
+    def get_value(self, name, **labels):
+        with self.lock:
+            return self.values.get((name, tuple(sorted(labels.items()))), 0)
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    def inc(self, name, amount=1, **labels):
+        with self.lock:
+            self.values[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, value, **labels):
+        buckets = self.descriptions[name][2]
+        with self.lock:
+            histogram = self.histograms.setdefault((name, tuple(sorted(labels.items()))), [[0] * len(buckets), 0.0, 0])
+            for index, upper_bound in enumerate(buckets):
+                if value <= upper_bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextlib.contextmanager
+    def time_stage(self, stage, **span_args):
+        self.inc("channeltube_stage_active", 1, stage=stage)
+        start_time = time.perf_counter()
+        try:
+            with self.tracer.span(stage, "stage", **span_args) if self.tracer else contextlib.nullcontext():
+                yield
+
+        finally:
+            self.observe("channeltube_stage_duration_seconds", time.perf_counter() - start_time, stage=stage)
+            self.inc("channeltube_stage_active", -1, stage=stage)
+
+    def time_iterator(self, stage, iterable):
+        iterator = iter(iterable)
+        elapsed = 0
+        try:
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start_time
+                yield item
+
+        finally:
+            self.observe("channeltube_stage_duration_seconds", elapsed, stage=stage)
+
+    def record_http_status(self, source, status_code):
+        if status_code == 429 or status_code == 403:
+            status_class = str(status_code)
+        elif 500 <= status_code < 600:
+            status_class = "5xx"
+        elif 400 <= status_code < 500:
+            status_class = "4xx"
+        else:
+            return
+        self.inc("channeltube_http_errors_total", source=source, status_class=status_class)
+
+    def record_http_error(self, source, error):
+        status_match = self.http_status_pattern.search(str(error))
+        if status_match:
+            self.record_http_status(source, int(next(group for group in status_match.groups() if group)))
+
+    def escape_label_value(self, label_value):
+        return str(label_value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def format_sample(self, name, labels, value):
+        value_text = str(int(value)) if float(value).is_integer() else repr(float(value))
+        if not labels:
+            return f"{name} {value_text}"
+        label_text = ",".join(f'{key}="{self.escape_label_value(label_value)}"' for key, label_value in labels)
+        return f"{name}{{{label_text}}} {value_text}"
+
+    def render(self):
+        samples = collections.defaultdict(list)
+        with self.lock:
+            for (name, labels), value in self.values.items():
+                samples[name].append(self.format_sample(name, labels, value))
+
+            for (name, labels), (bucket_counts, total, count) in self.histograms.items():
+                cumulative_count = 0
+                for upper_bound, bucket_count in zip(self.descriptions[name][2], bucket_counts):
+                    cumulative_count += bucket_count
+                    samples[name].append(self.format_sample(f"{name}_bucket", labels + (("le", str(upper_bound)),), cumulative_count))
+                samples[name].append(self.format_sample(f"{name}_bucket", labels + (("le", "+Inf"),), count))
+                samples[name].append(self.format_sample(f"{name}_sum", labels, total))
+                samples[name].append(self.format_sample(f"{name}_count", labels, count))
+
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                samples[name].append(self.format_sample(name, tuple(sorted(labels.items())), value))
+
+        lines = []
+        for name in sorted(samples):
+            metric_type, help_text, _ = self.descriptions.get(name, ("untyped", name, None))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+class Database:
+    def __init__(self, db_path):
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+    def execute(self, query, params=()):
+        with self.lock, self.connection:
+            return self.connection.execute(query, params).rowcount
+
+    def executemany(self, query, param_list):
+        with self.lock, self.connection:
+            return self.connection.executemany(query, param_list).rowcount
+
+    def fetch_all(self, query, params=()):
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(query, params).fetchall()]
+
+    def fetch_one(self, query, params=()):
+        with self.lock:
+            row = self.connection.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+
+class ConfigStore:
+    def __init__(self, database, logger):
+        self.database = database
+        self.general_logger = logger
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS channels (
+                id INTEGER PRIMARY KEY,
+                data TEXT NOT NULL
+            )"""
+        )
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )"""
+        )
+
+    def has_channels(self):
+        return self.database.fetch_one("SELECT 1 FROM channels LIMIT 1") is not None
+
+    def load_channels(self):
+        return [json.loads(row["data"]) for row in self.database.fetch_all("SELECT data FROM channels ORDER BY id")]
+
+    def insert_channels(self, channels):
+        self.database.executemany("INSERT OR REPLACE INTO channels (id, data) VALUES (?, ?)", [(channel["Id"], json.dumps(channel)) for channel in channels])
+
+    def update_channel(self, channel):
+        self.database.execute("UPDATE channels SET data = ? WHERE id = ?", (json.dumps(channel), channel["Id"]))
+
+    def delete_channel(self, channel_id):
+        self.database.execute("DELETE FROM channels WHERE id = ?", (channel_id,))
+
+    def has_settings(self):
+        return self.database.fetch_one("SELECT 1 FROM settings LIMIT 1") is not None
+
+    def load_settings(self):
+        return {row["key"]: json.loads(row["value"]) for row in self.database.fetch_all("SELECT key, value FROM settings")}
+
+    def save_settings(self, settings):
+        self.database.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", [(key, json.dumps(value)) for key, value in settings.items()])
+
+
+class MediaIndex:
+    file_key = "COALESCE(device || ':' || inode, path)"
+
+    def __init__(self, database, logger):
+        self.database = database
+        self.general_logger = logger
+        self.files_parsed = 0
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS media_files (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                video_id TEXT,
+                title TEXT,
+                downloaded_at REAL,
+                media_type TEXT,
+                device INTEGER,
+                inode INTEGER
+            )"""
+        )
+        existing_columns = {row["name"] for row in self.database.fetch_all("PRAGMA table_info(media_files)")}
+        for column_name in ["device", "inode"]:
+            if column_name not in existing_columns:
+                self.database.execute(f"ALTER TABLE media_files ADD COLUMN {column_name} INTEGER")
+        self.database.execute("CREATE INDEX IF NOT EXISTS idx_media_files_folder ON media_files (folder)")
+        self.database.execute("CREATE INDEX IF NOT EXISTS idx_media_files_video_id ON media_files (video_id)")
+        self.database.execute("CREATE INDEX IF NOT EXISTS idx_media_files_expiry ON media_files (folder, media_type, downloaded_at)")
+
+    def scan_folder(self, folder_path):
+        folder_path = os.path.normpath(folder_path)
+        known_entries = {row["path"]: row for row in self.database.fetch_all("SELECT * FROM media_files WHERE folder = ?", (folder_path,))}
+        entries = []
+        refreshed_entries = []
+
+        for filename in os.listdir(folder_path):
+            file_ext = os.path.splitext(filename)[1].lower()
+            if file_ext not in MEDIA_FILE_EXTENSIONS:
+                continue
+
+            file_path = os.path.join(folder_path, filename)
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+
+            entry = known_entries.pop(file_path, None)
+            if entry is None or entry["size"] != file_stat.st_size or entry["mtime"] != file_stat.st_mtime:
+                entry = self.read_file_metadata(file_path, file_stat)
+                refreshed_entries.append(entry)
+            elif entry["inode"] != file_stat.st_ino or entry["device"] != file_stat.st_dev:
+                entry = {**entry, "device": file_stat.st_dev, "inode": file_stat.st_ino}
+                refreshed_entries.append(entry)
+            entries.append(entry)
+
+        if refreshed_entries:
+            self.save_entries(refreshed_entries)
+        if known_entries:
+            self.database.executemany("DELETE FROM media_files WHERE path = ?", [(path,) for path in known_entries])
+
+        self.general_logger.info(f"Media index for {folder_path}: {len(entries)} files, {len(refreshed_entries)} re-read, {len(known_entries)} removed.")
+        return entries
+
+    def read_file_metadata(self, file_path, file_stat):
+        self.files_parsed += 1
+        file_ext = os.path.splitext(file_path)[1].lower()
+        entry = {
+            "path": file_path,
+            "folder": os.path.dirname(file_path),
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "video_id": None,
+            "title": None,
+            "downloaded_at": file_stat.st_mtime,
+            "media_type": "Audio" if file_ext in AUDIO_EXTENSIONS else "Video",
+            "device": file_stat.st_dev,
+            "inode": file_stat.st_ino,
+        }
+        try:
+            mp4_file = MP4(file_path)
+            entry["video_id"] = mp4_file.get("\xa9cmt", [None])[0]
+            entry["title"] = mp4_file.get("\xa9nam", [None])[0]
+            created_timestamp = mp4_file.get("\xa9day", [None])[0]
+            if created_timestamp:
+                entry["downloaded_at"] = datetime.datetime.strptime(created_timestamp, METADATA_TIMESTAMP_FORMAT).timestamp()
+            else:
+                self.general_logger.warning(f"No timestamp found in metadata of {file_path}, using filesystem modified timestamp")
+
+        except Exception as e:
+            self.general_logger.error(f"No video ID present or cannot read it from metadata of {file_path}: {e}")
+
+        return entry
+
+    def record_file(self, file_path, video_id, title, downloaded_at, media_type):
+        file_path = os.path.normpath(file_path)
+        file_stat = os.stat(file_path)
+        entry = {
+            "path": file_path,
+            "folder": os.path.dirname(file_path),
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "video_id": video_id,
+            "title": title,
+            "downloaded_at": downloaded_at,
+            "media_type": media_type,
+            "device": file_stat.st_dev,
+            "inode": file_stat.st_ino,
+        }
+        self.save_entries([entry])
+        return entry
+
+    def save_entries(self, entries):
+        self.database.executemany(
+            """INSERT OR REPLACE INTO media_files (path, folder, size, mtime, video_id, title, downloaded_at, media_type, device, inode)
+            VALUES (:path, :folder, :size, :mtime, :video_id, :title, :downloaded_at, :media_type, :device, :inode)""",
+            entries,
+        )
+
+    def remove_file(self, file_path):
+        self.remove_files([file_path])
+
+    def remove_files(self, file_paths):
+        self.database.executemany("DELETE FROM media_files WHERE path = ?", [(os.path.normpath(file_path),) for file_path in file_paths])
+
+    def find_copies(self, video_id, media_type):
+        return self.database.fetch_all("SELECT * FROM media_files WHERE video_id = ? AND media_type = ? ORDER BY downloaded_at DESC", (video_id, media_type))
+
+    def get_total_size(self, folder_paths=None):
+        return self.get_exclusive_size(None, folder_paths)
+
+    def get_exclusive_size(self, owner_folder_paths, folder_paths=None):
+        query_params = []
+        scope_filter = ""
+        if folder_paths is not None:
+            folder_paths = [os.path.normpath(folder_path) for folder_path in folder_paths]
+            scope_filter = f'WHERE folder IN ({", ".join("?" for _ in folder_paths)})'
+            query_params.extend(folder_paths)
+
+        owner_filter = ""
+        if owner_folder_paths is not None:
+            owner_folder_paths = [os.path.normpath(folder_path) for folder_path in owner_folder_paths]
+            owner_filter = f'HAVING SUM(folder NOT IN ({", ".join("?" for _ in owner_folder_paths)})) = 0'
+            query_params.extend(owner_folder_paths)
+
+        row = self.database.fetch_one(
+            f"SELECT COALESCE(SUM(size), 0) AS total FROM (SELECT MAX(size) AS size FROM media_files {scope_filter} GROUP BY {self.file_key} {owner_filter})",
+            query_params,
+        )
+        return row["total"]
+
+    def get_eviction_candidates(self, owner_folder_paths, folder_paths=None, limit=100):
+        owner_folder_paths = [os.path.normpath(folder_path) for folder_path in owner_folder_paths]
+        if not owner_folder_paths:
+            return []
+
+        owner_placeholders = ", ".join("?" for _ in owner_folder_paths)
+        scope_filter = ""
+        scope_params = []
+        if folder_paths is not None:
+            scope_params = [os.path.normpath(folder_path) for folder_path in folder_paths]
+            scope_filter = f'WHERE folder IN ({", ".join("?" for _ in scope_params)})'
+
+        return self.database.fetch_all(
+            f"""SELECT media_files.*, linked_files.link_count FROM media_files
+            JOIN (SELECT {self.file_key} AS file_key, COUNT(*) AS link_count, SUM(folder NOT IN ({owner_placeholders})) AS outside_count FROM media_files {scope_filter} GROUP BY {self.file_key}) AS linked_files
+            ON linked_files.file_key = {self.file_key}
+            WHERE linked_files.outside_count = 0 AND folder IN ({owner_placeholders})
+            ORDER BY linked_files.link_count > 1, downloaded_at LIMIT ?""",
+            (*owner_folder_paths, *scope_params, *owner_folder_paths, limit),
+        )
+
+    def get_expired_files(self, folder_path, media_type, cutoff_timestamp):
+        return self.database.fetch_all(
+            "SELECT * FROM media_files WHERE folder = ? AND media_type = ? AND downloaded_at < ? ORDER BY downloaded_at",
+            (os.path.normpath(folder_path), media_type, cutoff_timestamp),
+        )
+
+    def get_folder_paths(self, folder_path):
+        return [row["path"] for row in self.database.fetch_all("SELECT path FROM media_files WHERE folder = ?", (os.path.normpath(folder_path),))]
+
+    def get_oldest_download_time(self, folder_path, media_type):
+        row = self.database.fetch_one("SELECT MIN(downloaded_at) AS oldest FROM media_files WHERE folder = ? AND media_type = ?", (os.path.normpath(folder_path), media_type))
+        return row["oldest"] if row else None
+
+
+class VideoMetadataCache:
+    def __init__(self, database, logger, metadata_ttl_seconds, live_ttl_seconds, failed_ttl_seconds):
+        self.database = database
+        self.general_logger = logger
+        self.metadata_ttl_seconds = metadata_ttl_seconds
+        self.live_ttl_seconds = live_ttl_seconds
+        self.failed_ttl_seconds = failed_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS video_metadata (
+                video_id TEXT PRIMARY KEY,
+                upload_date TEXT,
+                timestamp REAL,
+                live_status TEXT,
+                duration REAL,
+                rejection_reason TEXT,
+                cached_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self.database.execute("CREATE INDEX IF NOT EXISTS idx_video_metadata_expires_at ON video_metadata (expires_at)")
+
+    def get(self, video_id):
+        cached_metadata = self.database.fetch_one("SELECT * FROM video_metadata WHERE video_id = ? AND expires_at > ?", (video_id, time.time()))
+        if cached_metadata:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return cached_metadata
+
+    def store(self, video_id, video_extracted_info):
+        current_time = time.time()
+        live_status = video_extracted_info.get("live_status")
+        if live_status in ("is_upcoming", "is_live", "post_live"):
+            expires_at = current_time + self.live_ttl_seconds
+        else:
+            expires_at = current_time + self.metadata_ttl_seconds
+
+        cached_metadata = {
+            "video_id": video_id,
+            "upload_date": video_extracted_info.get("upload_date"),
+            "timestamp": video_extracted_info.get("timestamp"),
+            "live_status": live_status,
+            "duration": video_extracted_info.get("duration"),
+            "rejection_reason": None,
+            "cached_at": current_time,
+            "expires_at": expires_at,
+        }
+        self.database.execute(
+            """INSERT OR REPLACE INTO video_metadata (video_id, upload_date, timestamp, live_status, duration, rejection_reason, cached_at, expires_at)
+            VALUES (:video_id, :upload_date, :timestamp, :live_status, :duration, :rejection_reason, :cached_at, :expires_at)""",
+            cached_metadata,
+        )
+        return cached_metadata
+
+    def store_failure(self, video_id, error_message):
+        current_time = time.time()
+        self.database.execute(
+            """INSERT OR REPLACE INTO video_metadata (video_id, rejection_reason, cached_at, expires_at)
+            VALUES (?, ?, ?, ?)""",
+            (video_id, f"failed: {error_message}"[:500], current_time, current_time + self.failed_ttl_seconds),
+        )
+
+    def mark_rejected(self, video_id, rejection_reason, expires_at=None):
+        if expires_at is None:
+            self.database.execute("UPDATE video_metadata SET rejection_reason = ? WHERE video_id = ?", (rejection_reason, video_id))
+        else:
+            self.database.execute("UPDATE video_metadata SET rejection_reason = ?, expires_at = MIN(expires_at, ?) WHERE video_id = ?", (rejection_reason, expires_at, video_id))
+
+    def purge_expired(self):
+        removed_count = self.database.execute("DELETE FROM video_metadata WHERE expires_at <= ?", (time.time(),))
+        if removed_count:
+            self.general_logger.info(f"Removed {removed_count} expired entries from video metadata cache.")
+
+
+class ChannelFeedMonitor:
+    def __init__(self, database, logger, feed_url, max_skip_seconds, request_timeout=10):
+        self.database = database
+        self.general_logger = logger
+        self.feed_url = feed_url
+        self.max_skip_seconds = max_skip_seconds
+        self.request_timeout = request_timeout
+        self.session = requests.Session()
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS channel_feeds (
+                channel_link TEXT PRIMARY KEY,
+                feed_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                newest_video_id TEXT,
+                recheck_required INTEGER NOT NULL DEFAULT 1,
+                discovered_at REAL
+            )"""
+        )
+
+    def build_feed_url(self, channel_id=None, playlist_id=None):
+        query = {"playlist_id": playlist_id} if playlist_id else {"channel_id": channel_id}
+        return f"{self.feed_url}?{urllib.parse.urlencode(query)}"
+
+    def set_feed_source(self, channel_link, channel_id=None, playlist_id=None):
+        if not channel_id and not playlist_id:
+            return
+        feed_url = self.build_feed_url(channel_id=channel_id, playlist_id=playlist_id)
+        self.database.execute(
+            """INSERT INTO channel_feeds (channel_link, feed_url) VALUES (?, ?)
+            ON CONFLICT (channel_link) DO UPDATE SET feed_url = excluded.feed_url""",
+            (channel_link, feed_url),
+        )
+
+    def check_feed(self, channel):
+        feed_state = self.database.fetch_one("SELECT * FROM channel_feeds WHERE channel_link = ?", (channel["Link"],))
+        feed_snapshot = {"unchanged": False, "etag": None, "last_modified": None, "newest_video_id": None}
+        if not feed_state or not feed_state["feed_url"] or channel["Live_Rule"] == "Only":
+            return feed_snapshot
+
+        headers = {}
+        if feed_state["etag"]:
+            headers["If-None-Match"] = feed_state["etag"]
+        if feed_state["last_modified"]:
+            headers["If-Modified-Since"] = feed_state["last_modified"]
+
+        try:
+            response = self.session.get(feed_state["feed_url"], headers=headers, timeout=self.request_timeout)
+            if response.status_code == 304:
+                feed_snapshot.update({"etag": feed_state["etag"], "last_modified": feed_state["last_modified"], "newest_video_id": feed_state["newest_video_id"]})
+            elif response.status_code == 200:
+                newest_video_match = re.search(r"<yt:videoId>([^<]+)</yt:videoId>", response.text)
+                feed_snapshot.update(
+                    {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "newest_video_id": newest_video_match.group(1) if newest_video_match else None,
+                    }
+                )
+            else:
+                metrics.record_http_status("feed", response.status_code)
+                self.general_logger.warning(f'Feed check for {channel["Name"]} returned status {response.status_code}')
+                return feed_snapshot
+
+        except Exception as e:
+            self.general_logger.warning(f'Feed check for {channel["Name"]} failed: {e}')
+            return feed_snapshot
+
+        discovery_is_recent = feed_state["discovered_at"] and time.time() - feed_state["discovered_at"] < self.max_skip_seconds
+        feed_unchanged = feed_snapshot["newest_video_id"] == feed_state["newest_video_id"]
+        feed_snapshot["unchanged"] = bool(feed_unchanged and discovery_is_recent and not feed_state["recheck_required"])
+        return feed_snapshot
+
+    def record_discovery(self, channel, feed_snapshot, recheck_required):
+        self.database.execute(
+            """UPDATE channel_feeds SET etag = ?, last_modified = ?, newest_video_id = ?, recheck_required = ?, discovered_at = ?
+            WHERE channel_link = ?""",
+            (
+                feed_snapshot["etag"],
+                feed_snapshot["last_modified"],
+                feed_snapshot["newest_video_id"],
+                int(recheck_required or not feed_snapshot["newest_video_id"]),
+                time.time(),
+                channel["Link"],
+            ),
+        )
+
+    def reset(self, channel_link):
+        self.database.execute("UPDATE channel_feeds SET recheck_required = 1 WHERE channel_link = ?", (channel_link,))
+
+
+class UploadHistory:
+    def __init__(self, database, logger, max_staleness_seconds, sync_threshold, history_length=20):
+        self.database = database
+        self.general_logger = logger
+        self.max_staleness_seconds = max_staleness_seconds
+        self.sync_threshold = sync_threshold
+        self.history_length = history_length
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS channel_uploads (
+                channel_link TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (channel_link, video_id)
+            )"""
+        )
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS channel_checks (
+                channel_link TEXT PRIMARY KEY,
+                last_checked REAL NOT NULL
+            )"""
+        )
+
+    def record_upload(self, channel_link, video_id, timestamp):
+        if timestamp:
+            self.database.execute("INSERT OR IGNORE INTO channel_uploads (channel_link, video_id, timestamp) VALUES (?, ?, ?)", (channel_link, video_id, timestamp))
+
+    def record_check(self, channel_link):
+        self.database.execute("INSERT OR REPLACE INTO channel_checks (channel_link, last_checked) VALUES (?, ?)", (channel_link, time.time()))
+        self.database.execute(
+            """DELETE FROM channel_uploads WHERE channel_link = ? AND video_id NOT IN (
+                SELECT video_id FROM channel_uploads WHERE channel_link = ? ORDER BY timestamp DESC LIMIT ?
+            )""",
+            (channel_link, channel_link, self.history_length),
+        )
+
+    def get_expected_upload_interval(self, channel_link):
+        timestamps = [row["timestamp"] for row in self.database.fetch_all("SELECT timestamp FROM channel_uploads WHERE channel_link = ? ORDER BY timestamp DESC LIMIT ?", (channel_link, self.history_length))]
+        upload_gaps = sorted(newer - older for newer, older in zip(timestamps, timestamps[1:]) if newer > older)
+        if not upload_gaps:
+            return None
+        return max(upload_gaps[len(upload_gaps) // 2], 60)
+
+    def get_new_upload_probability(self, channel_link, current_time):
+        last_check = self.database.fetch_one("SELECT last_checked FROM channel_checks WHERE channel_link = ?", (channel_link,))
+        expected_interval = self.get_expected_upload_interval(channel_link)
+        if not last_check or not expected_interval:
+            return 1.0
+
+        elapsed_seconds = current_time - last_check["last_checked"]
+        if elapsed_seconds >= self.max_staleness_seconds:
+            return 1.0
+        return 1 - math.exp(-max(elapsed_seconds, 0) / expected_interval)
+
+    def prioritise_channels(self, channels):
+        current_time = time.time()
+        channel_probabilities = [(self.get_new_upload_probability(channel["Link"], current_time), channel) for channel in channels]
+        channel_probabilities.sort(key=lambda entry: entry[0], reverse=True)
+
+        channels_to_sync = []
+        for probability, channel in channel_probabilities:
+            if probability >= self.sync_threshold:
+                channels_to_sync.append(channel)
+            else:
+                self.general_logger.warning(f'Skipping channel: {channel["Name"]} - {probability:.0%} chance of a new upload since last check')
+
+        return channels_to_sync
+
+
+class ScratchSpace:
+    def __init__(self, logger, max_age_seconds, max_size_bytes, folder_name=".channeltube_scratch"):
+        self.general_logger = logger
+        self.max_age_seconds = max_age_seconds
+        self.max_size_bytes = max_size_bytes
+        self.folder_name = folder_name
+        self.lock = threading.Lock()
+        self.active_directories = set()
+
+    def get_directory(self, root_folder, video_id, download_profile):
+        profile_hash = hashlib.sha1(download_profile.encode()).hexdigest()[:8]
+        return os.path.abspath(os.path.join(root_folder, self.folder_name, f"{video_id}-{profile_hash}"))
+
+    def open_directory(self, root_folder, video_id, download_profile):
+        scratch_directory = self.get_directory(root_folder, video_id, download_profile)
+        with self.lock:
+            if scratch_directory in self.active_directories:
+                raise Exception(f"Scratch directory already in use: {scratch_directory}")
+            self.active_directories.add(scratch_directory)
+
+        try:
+            if os.path.isdir(scratch_directory) and os.listdir(scratch_directory):
+                self.general_logger.warning(f"Resuming from partial download in: {scratch_directory}")
+            os.makedirs(scratch_directory, exist_ok=True)
+
+        except Exception:
+            self.close_directory(scratch_directory, completed=False)
+            raise
+
+        return scratch_directory
+
+    def close_directory(self, scratch_directory, completed):
+        if completed:
+            shutil.rmtree(scratch_directory, ignore_errors=True)
+        else:
+            self.general_logger.warning(f"Keeping partial download in: {scratch_directory}")
+        with self.lock:
+            self.active_directories.discard(scratch_directory)
+
+    def get_directory_usage(self, scratch_directory):
+        total_size = 0
+        latest_mtime = os.path.getmtime(scratch_directory)
+        for dir_path, dir_names, filenames in os.walk(scratch_directory):
+            for filename in filenames:
+                try:
+                    file_stat = os.stat(os.path.join(dir_path, filename))
+                except OSError:
+                    continue
+                total_size += file_stat.st_size
+                latest_mtime = max(latest_mtime, file_stat.st_mtime)
+        return total_size, latest_mtime
+
+    def collect_garbage(self, root_folders):
+        current_time = time.time()
+        scratch_directories = []
+        for root_folder in root_folders:
+            scratch_root = os.path.abspath(os.path.join(root_folder, self.folder_name))
+            if not os.path.isdir(scratch_root):
+                continue
+            for directory_name in os.listdir(scratch_root):
+                scratch_directory = os.path.join(scratch_root, directory_name)
+                with self.lock:
+                    if scratch_directory in self.active_directories:
+                        continue
+                try:
+                    total_size, latest_mtime = self.get_directory_usage(scratch_directory)
+                except OSError:
+                    continue
+                scratch_directories.append((latest_mtime, total_size, scratch_directory))
+
+        scratch_directories.sort()
+        total_scratch_size = sum(total_size for _, total_size, _ in scratch_directories)
+        for latest_mtime, total_size, scratch_directory in scratch_directories:
+            expired = current_time - latest_mtime > self.max_age_seconds
+            over_budget = total_scratch_size > self.max_size_bytes
+            if not (expired or over_budget):
+                continue
+
+            shutil.rmtree(scratch_directory, ignore_errors=True)
+            total_scratch_size -= total_size
+            reason = "older than the age limit" if expired else "over the size limit"
+            self.general_logger.warning(f"Removed partial download: {scratch_directory} ({total_size} bytes) as it is {reason}")
+
+
+class StorageBudget:
+    def __init__(self, media_index, logger, global_quota_bytes, policy):
+        self.media_index = media_index
+        self.general_logger = logger
+        self.global_quota_bytes = global_quota_bytes
+        self.policy = policy
+        self.lock = threading.RLock()
+        self.reservations = {}
+
+    def get_usage(self, folder_paths=None):
+        with self.lock:
+            reserved_bytes = sum(size for reserved_folder, size in self.reservations.values() if folder_paths is None or reserved_folder in folder_paths)
+        return self.media_index.get_total_size(folder_paths) + reserved_bytes
+
+    def reserve(self, reservation_id, folder_path, expected_bytes):
+        with self.lock:
+            self.reservations[reservation_id] = (folder_path, expected_bytes)
+
+    def release(self, reservation_id):
+        with self.lock:
+            self.reservations.pop(reservation_id, None)
+
+
+class RetryQueue:
+    error_patterns = [
+        ("storage_quota", ("storage quota",)),
+        ("rate_limited", ("http error 429", "too many requests", "rate-limit", "rate limit", "try again later", "confirm you're not a bot", "confirm you’re not a bot")),
+        ("age_restricted", ("confirm your age", "age-restricted", "age restricted", "inappropriate for some users")),
+        ("unavailable", ("video unavailable", "private video", "has been removed", "members-only", "join this channel", "not available in your country", "account associated with this video has been terminated")),
+        ("transient", ("timed out", "timeout", "connection", "temporary failure", "http error 5", "incompleteread", "unable to download", "fragment")),
+    ]
+    permanent_error_classes = {"unavailable", "age_restricted"}
+
+    def __init__(self, database, logger, max_attempts, base_delay_seconds, max_delay_seconds, permanent_retention_seconds):
+        self.database = database
+        self.general_logger = logger
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.permanent_retention_seconds = permanent_retention_seconds
+        self.wake_event = threading.Event()
+        self.database.execute(
+            """CREATE TABLE IF NOT EXISTS download_retries (
+                video_id TEXT PRIMARY KEY,
+                channel_link TEXT NOT NULL,
+                item TEXT NOT NULL,
+                error_class TEXT NOT NULL,
+                last_error TEXT,
+                attempts INTEGER NOT NULL,
+                permanent INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self.database.execute("CREATE INDEX IF NOT EXISTS idx_download_retries_next_attempt_at ON download_retries (permanent, next_attempt_at)")
+
+    def classify_error(self, error_message):
+        error_message = error_message.lower()
+        for error_class, patterns in self.error_patterns:
+            if any(pattern in error_message for pattern in patterns):
+                return error_class
+        return "unknown"
+
+    def record_failure(self, channel, item, error):
+        error_message = str(error)
+        error_class = self.classify_error(error_message)
+        existing_entry = self.database.fetch_one("SELECT attempts FROM download_retries WHERE video_id = ?", (item["id"],))
+        attempts = (existing_entry["attempts"] if existing_entry else 0) + 1
+        permanent = error_class in self.permanent_error_classes or attempts >= self.max_attempts
+
+        delay_seconds = self.base_delay_seconds * (2 ** (attempts - 1)) * (4 if error_class == "rate_limited" else 1)
+        next_attempt_at = None if permanent else time.time() + min(delay_seconds, self.max_delay_seconds)
+        serialised_item = json.dumps({**item, "upload_date": item["upload_date"].isoformat() if item.get("upload_date") else None})
+
+        self.database.execute(
+            """INSERT OR REPLACE INTO download_retries (video_id, channel_link, item, error_class, last_error, attempts, permanent, next_attempt_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (item["id"], channel["Link"], serialised_item, error_class, error_message[:1000], attempts, int(permanent), next_attempt_at, time.time()),
+        )
+
+        if permanent:
+            self.general_logger.warning(f'Giving up on {item["title"]} after {attempts} attempts ({error_class})')
+        else:
+            self.general_logger.warning(f'Retry {attempts} of {item["title"]} ({error_class}) scheduled at {datetime.datetime.fromtimestamp(next_attempt_at)}')
+            self.wake_event.set()
+
+        return error_class
+
+    def record_success(self, video_id):
+        self.database.execute("DELETE FROM download_retries WHERE video_id = ?", (video_id,))
+
+    def get_entry(self, video_id):
+        return self.database.fetch_one("SELECT * FROM download_retries WHERE video_id = ?", (video_id,))
+
+    def get_due_entries(self):
+        due_entries = self.database.fetch_all("SELECT * FROM download_retries WHERE permanent = 0 AND next_attempt_at <= ? ORDER BY next_attempt_at", (time.time(),))
+        for entry in due_entries:
+            entry["item"] = json.loads(entry["item"])
+            if entry["item"].get("upload_date"):
+                entry["item"]["upload_date"] = datetime.datetime.fromisoformat(entry["item"]["upload_date"])
+        return due_entries
+
+    def get_pending_count(self):
+        pending_entries = self.database.fetch_one("SELECT COUNT(*) AS pending FROM download_retries WHERE permanent = 0")
+        return pending_entries["pending"] if pending_entries else 0
+
+    def get_next_attempt_time(self):
+        next_entry = self.database.fetch_one("SELECT MIN(next_attempt_at) AS next_attempt_at FROM download_retries WHERE permanent = 0")
+        return next_entry["next_attempt_at"] if next_entry else None
+
+    def remove_channel(self, channel_link):
+        self.database.execute("DELETE FROM download_retries WHERE channel_link = ?", (channel_link,))
+
+    def purge_permanent_failures(self):
+        if self.permanent_retention_seconds <= 0:
+            return 0
+        return self.clear_permanent_failures(time.time() - self.permanent_retention_seconds)
+
+    def clear_permanent_failures(self, updated_before=None):
+        updated_before = time.time() if updated_before is None else updated_before
+        expired_entries = self.database.fetch_one("SELECT COUNT(*) AS expired FROM download_retries WHERE permanent = 1 AND updated_at <= ?", (updated_before,))
+        self.database.execute("DELETE FROM download_retries WHERE permanent = 1 AND updated_at <= ?", (updated_before,))
+        return expired_entries["expired"] if expired_entries else 0
+
+
+class YoutubeDLPool:
+    def __init__(self, max_idle_per_profile=4):
+        self.lock = threading.Lock()
+        self.max_idle_per_profile = max_idle_per_profile
+        self.option_profiles = {}
+        self.idle_instances = collections.defaultdict(list)
+
+    def register_profile(self, profile_name, ydl_opts):
+        with self.lock:
+            self.option_profiles[profile_name] = ydl_opts
+            stale_instances = self.idle_instances.pop(profile_name, [])
+        for ydl in stale_instances:
+            ydl.close()
+
+    @contextlib.contextmanager
+    def acquire(self, profile_name, param_overrides=None):
+        with self.lock:
+            ydl_opts = self.option_profiles[profile_name]
+            idle_instances = self.idle_instances[profile_name]
+            ydl = idle_instances.pop() if idle_instances else None
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(dict(ydl_opts))
+
+        original_params = {}
+        for key, value in (param_overrides or {}).items():
+            original_params[key] = copy.deepcopy(ydl.params[key]) if key in ydl.params else None
+            if isinstance(value, dict) and isinstance(ydl.params.get(key), dict):
+                ydl.params[key].update(value)
+            else:
+                ydl.params[key] = value
+
+        try:
+            yield ydl
+
+        finally:
+            for key, value in original_params.items():
+                if value is None:
+                    ydl.params.pop(key, None)
+                else:
+                    ydl.params[key] = value
+            with self.lock:
+                reusable = self.option_profiles.get(profile_name) is ydl_opts and len(self.idle_instances[profile_name]) < self.max_idle_per_profile
+                if reusable:
+                    self.idle_instances[profile_name].append(ydl)
+            if not reusable:
+                ydl.close()
+
+
+class RoundRobinQueue:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queues = collections.OrderedDict()
+        self.closed = False
+
+    def put(self, key, item):
+        with self.condition:
+            self.queues.setdefault(key, collections.deque()).append(item)
+            self.condition.notify()
+
+    def get(self):
+        with self.condition:
+            while not self.queues and not self.closed:
+                self.condition.wait()
+            if not self.queues:
+                return None
+
+            key, queue = self.queues.popitem(last=False)
+            item = queue.popleft()
+            if queue:
+                self.queues[key] = queue
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        with self.condition:
+            return sum(len(queue) for queue in self.queues.values())
+
+
+class ChannelUpdatePublisher:
+    def __init__(self, emit, min_interval_seconds):
+        self.emit = emit
+        self.min_interval_seconds = min_interval_seconds
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.pending_updates = {}
+
+    def publish(self, channel_id, changed_fields):
+        with self.lock:
+            self.pending_updates.setdefault(channel_id, {}).update(changed_fields)
+        self.wake_event.set()
+
+    def discard(self, channel_id):
+        with self.lock:
+            self.pending_updates.pop(channel_id, None)
+
+    def run(self):
+        while True:
+            self.wake_event.wait()
+            self.wake_event.clear()
+            with self.lock:
+                pending_updates = self.pending_updates
+                self.pending_updates = {}
+
+            for channel_id, changed_fields in pending_updates.items():
+                self.emit("channel_updated", {"Id": channel_id, **changed_fields})
+            time.sleep(self.min_interval_seconds)
+
+
+class DownloadProgressTracker:
+    def __init__(self, emit, logger, interval_seconds, log_interval_seconds=5):
+        self.emit = emit
+        self.general_logger = logger
+        self.interval_seconds = interval_seconds
+        self.log_interval_seconds = log_interval_seconds
+        self.lock = threading.Lock()
+        self.items = {}
+        self.finished_ids = set()
+        self.changed = False
+        self.last_logged_at = 0
+
+    def start_item(self, video_id, title, channel_name):
+        with self.lock:
+            self.items[video_id] = {
+                "Id": video_id,
+                "Title": title,
+                "Channel": channel_name,
+                "Phase": "Downloading",
+                "Postprocessor": None,
+                "Downloaded_Bytes": 0,
+                "Total_Bytes": None,
+                "Speed": None,
+                "ETA": None,
+                "Fragment_Index": None,
+                "Is_Live": False,
+                "Started_At": time.time(),
+            }
+            self.finished_ids.discard(video_id)
+            self.changed = True
+
+    def update_item(self, video_id, **fields):
+        with self.lock:
+            item = self.items.get(video_id)
+            if item is not None:
+                item.update(fields)
+                self.changed = True
+
+    def finish_item(self, video_id, phase):
+        with self.lock:
+            if video_id in self.items:
+                self.items[video_id].update({"Phase": phase, "Speed": None, "ETA": None, "Postprocessor": None})
+                self.finished_ids.add(video_id)
+                self.changed = True
+
+    def run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            if not self.changed:
+                continue
+
+            with self.lock:
+                self.changed = False
+                snapshot = [dict(item) for item in self.items.values()]
+                for video_id in self.finished_ids:
+                    self.items.pop(video_id, None)
+                self.finished_ids.clear()
+
+            self.emit("download_progress", {"Items": snapshot})
+            if time.time() - self.last_logged_at >= self.log_interval_seconds:
+                self.last_logged_at = time.time()
+                self.log_progress(snapshot)
+
+    def log_progress(self, snapshot):
+        for item in snapshot:
+            if item["Phase"] != "Downloading":
+                continue
+            downloaded_bytes_str = yt_dlp.utils.format_bytes(item["Downloaded_Bytes"])
+            if item["Is_Live"]:
+                minutes, seconds = divmod(time.time() - item["Started_At"], 60)
+                elapsed_str = f"{int(minutes)} minutes and {int(seconds)} seconds"
+                self.general_logger.warning(f'Live Video - Downloaded: {downloaded_bytes_str} (Fragment Index: {item["Fragment_Index"]}, Elapsed: {elapsed_str})')
+            else:
+                percent_str = f'{item["Downloaded_Bytes"] / item["Total_Bytes"] * 100:.1f}%' if item["Total_Bytes"] else "unknown"
+                total_bytes_str = yt_dlp.utils.format_bytes(item["Total_Bytes"]) if item["Total_Bytes"] else "unknown"
+                speed_str = f'{yt_dlp.utils.format_bytes(item["Speed"])}/s' if item["Speed"] else "unknown"
+                eta_str = yt_dlp.utils.formatSeconds(item["ETA"]) if item["ETA"] is not None else "unknown"
+                self.general_logger.warning(f'{item["Title"]} - Downloaded {percent_str} of {total_bytes_str} at {speed_str} with ETA {eta_str}')
+
+
+class MediaServerNotifier:
+    def __init__(self, logger, debounce_seconds, max_delay_seconds, request_timeout=30):
+        self.general_logger = logger
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.request_timeout = request_timeout
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.session = requests.Session()
+        self.media_servers = {}
+        self.media_tokens = {}
+        self.library_name = ""
+        self.plex_server = None
+        self.plex_server_key = None
+        self.changed_folders = set()
+        self.pending_folders = set()
+
+    def configure(self, media_servers, media_tokens, library_name):
+        with self.lock:
+            self.media_servers = media_servers
+            self.media_tokens = media_tokens
+            self.library_name = library_name
+
+    def record_change(self, folder_name):
+        with self.lock:
+            self.changed_folders.add(folder_name)
+
+    def notify(self, folder_name):
+        with self.lock:
+            if folder_name not in self.changed_folders:
+                return
+            self.changed_folders.discard(folder_name)
+            self.pending_folders.add(folder_name)
+        self.wake_event.set()
+
+    def run(self):
+        while True:
+            self.wake_event.wait()
+            first_notified_at = time.monotonic()
+            self.wake_event.clear()
+            while time.monotonic() - first_notified_at < self.max_delay_seconds and self.wake_event.wait(timeout=self.debounce_seconds):
+                self.wake_event.clear()
+
+            with self.lock:
+                folder_names = sorted(self.pending_folders)
+                self.pending_folders.clear()
+                media_servers = self.media_servers
+                media_tokens = self.media_tokens
+                library_name = self.library_name
+
+            if folder_names:
+                with metrics.time_stage("media_server_refresh"):
+                    self.refresh(folder_names, media_servers, media_tokens, library_name)
+
+    def refresh(self, folder_names, media_servers, media_tokens, library_name):
+        if "Plex" in media_servers and "Plex" in media_tokens:
+            try:
+                self.general_logger.warning(f'Attempting Plex Sync for: {", ".join(folder_names)}')
+                self.refresh_plex(media_servers["Plex"], media_tokens["Plex"], library_name, folder_names)
+
+            except Exception as e:
+                self.plex_server = None
+                metrics.record_http_error("plex", e)
+                self.general_logger.warning(f"Plex Library scan failed: {str(e)}")
+
+        if "Jellyfin" in media_servers and "Jellyfin" in media_tokens:
+            try:
+                self.general_logger.warning(f'Attempting Jellyfin Sync for: {", ".join(folder_names)}')
+                self.refresh_jellyfin(media_servers["Jellyfin"], media_tokens["Jellyfin"], library_name, folder_names)
+
+            except Exception as e:
+                metrics.record_http_error("jellyfin", e)
+                self.general_logger.warning(f"Jellyfin Library scan failed: {str(e)}")
+
+    def join_server_path(self, location, folder_name):
+        separator = "\\" if "\\" in location and "/" not in location else "/"
+        return f"{location.rstrip(separator)}{separator}{folder_name}"
+
+    def get_plex_server(self, address, token):
+        if self.plex_server is None or self.plex_server_key != (address, token):
+            self.plex_server = PlexServer(address, token, session=self.session, timeout=self.request_timeout)
+            self.plex_server_key = (address, token)
+        return self.plex_server
+
+    def refresh_plex(self, address, token, library_name, folder_names):
+        library_section = self.get_plex_server(address, token).library.section(library_name)
+        if not library_section.locations:
+            library_section.update()
+            self.general_logger.warning(f"Plex Library scan for '{library_name}' started.")
+            return
+
+        for folder_name in folder_names:
+            for location in library_section.locations:
+                library_section.update(path=self.join_server_path(location, folder_name))
+        self.general_logger.warning(f"Plex partial scan for '{library_name}' started for {len(folder_names)} folder(s).")
+
+    def refresh_jellyfin(self, address, token, library_name, folder_names):
+        response = self.session.get(f"{address}/Library/VirtualFolders", params={"api_key": token}, timeout=self.request_timeout)
+        response.raise_for_status()
+        locations = next((library.get("Locations") or [] for library in response.json() if library.get("Name") == library_name), [])
+
+        if locations:
+            updates = [{"Path": self.join_server_path(location, folder_name), "UpdateType": "Modified"} for folder_name in folder_names for location in locations]
+            response = self.session.post(f"{address}/Library/Media/Updated", params={"api_key": token}, json={"Updates": updates}, timeout=self.request_timeout)
+        else:
+            self.general_logger.warning(f"Jellyfin library '{library_name}' not found, requesting a full library refresh.")
+            response = self.session.post(f"{address}/Library/Refresh", params={"api_key": token}, timeout=self.request_timeout)
+
+        if response.status_code == 204:
+            self.general_logger.warning("Jellyfin Library refresh request successful.")
+        else:
+            metrics.record_http_status("jellyfin", response.status_code)
+            self.general_logger.warning(f"Jellyfin Error: {response.status_code}, {response.text}")
 
 
 class DataHandler:
@@ -38,11 +1442,28 @@ class DataHandler:
         self.media_server_addresses = "Plex: http://192.168.1.2:32400, Jellyfin: http://192.168.1.2:8096"
         self.media_server_tokens = "Plex: abc, Jellyfin: xyz"
         self.media_server_library_name = "YouTube"
-        self.media_server_scan_req_flag = False
         self.video_format_id = os.environ.get("video_format_id", "137")
         self.audio_format_id = os.environ.get("audio_format_id", "140")
         self.defer_hours = float(os.environ.get("defer_hours", "0"))
         self.thread_limit = int(os.environ.get("thread_limit", "1"))
+        self.discovery_thread_limit = int(os.environ.get("discovery_thread_limit", "4"))
+        self.extraction_thread_limit = int(os.environ.get("extraction_thread_limit", "1"))
+        self.postprocess_thread_limit = int(os.environ.get("postprocess_thread_limit", "1"))
+        self.stream_playlists = os.environ.get("stream_playlists", "true").lower() == "true"
+        self.sync_jitter_minutes = float(os.environ.get("sync_jitter_minutes", "0"))
+        self.scratch_max_age_hours = float(os.environ.get("scratch_max_age_hours", "72"))
+        self.scratch_max_size_gb = float(os.environ.get("scratch_max_size_gb", "20"))
+        self.storage_quota_gb = float(os.environ.get("storage_quota_gb", "0"))
+        self.storage_quota_policy = os.environ.get("storage_quota_policy", "evict").lower()
+        self.link_duplicates = os.environ.get("link_duplicates", "true").lower() == "true"
+        self.copy_duplicates = os.environ.get("copy_duplicates", "false").lower() == "true"
+        self.retry_max_attempts = int(os.environ.get("retry_max_attempts", "5"))
+        self.retry_base_minutes = float(os.environ.get("retry_base_minutes", "15"))
+        self.retry_max_hours = float(os.environ.get("retry_max_hours", "24"))
+        self.retry_permanent_days = float(os.environ.get("retry_permanent_days", "30"))
+        self.adaptive_sync = os.environ.get("adaptive_sync", "false").lower() == "true"
+        self.adaptive_sync_threshold = float(os.environ.get("adaptive_sync_threshold", "0.3"))
+        self.adaptive_max_staleness_hours = float(os.environ.get("adaptive_max_staleness_hours", "24"))
         self.fallback_vcodec = os.environ.get("fallback_vcodec", "vp9")
         self.fallback_acodec = os.environ.get("fallback_acodec", "mp4a")
         self.subtitles = os.environ.get("subtitles", "none").lower()
@@ -51,54 +1472,165 @@ class DataHandler:
         self.include_id_in_filename = os.environ.get("include_id_in_filename", "false").lower() == "true"
         self.verbose_logs = os.environ.get("verbose_logs", "false").lower() == "true"
         self.short_video_cutoff = int(os.environ.get("short_video_cutoff", "180"))
+        self.metadata_cache_days = float(os.environ.get("metadata_cache_days", "30"))
+        self.live_metadata_cache_minutes = float(os.environ.get("live_metadata_cache_minutes", "60"))
+        self.failed_metadata_cache_hours = float(os.environ.get("failed_metadata_cache_hours", "6"))
+        self.youtube_feed_url = os.environ.get("youtube_feed_url", "https://www.youtube.com/feeds/videos.xml")
+        self.feed_max_skip_hours = float(os.environ.get("feed_max_skip_hours", "24"))
+        self.media_server_debounce_seconds = float(os.environ.get("media_server_debounce_seconds", "60"))
+        self.trace_syncs = os.environ.get("trace_syncs", "false").lower() == "true"
+        self.trace_retention = int(os.environ.get("trace_retention", "10"))
+        self.channel_update_interval_seconds = float(os.environ.get("channel_update_interval_seconds", "0.5"))
+        self.progress_update_interval_seconds = float(os.environ.get("progress_update_interval_seconds", "0.5"))
+        self.background_tasks = os.environ.get("background_tasks", "true").lower() == "true"
 
         os.makedirs(self.config_folder, exist_ok=True)
         os.makedirs(self.download_folder, exist_ok=True)
         os.makedirs(self.audio_download_folder, exist_ok=True)
 
+        self.database = Database(os.path.join(self.config_folder, "channeltube.db"))
+        self.config_store = ConfigStore(self.database, self.general_logger)
+        self.media_index = MediaIndex(self.database, self.general_logger)
+        self.storage_budget = StorageBudget(self.media_index, self.general_logger, self.storage_quota_gb * 1024**3, self.storage_quota_policy)
+        self.video_metadata_cache = VideoMetadataCache(
+            self.database,
+            self.general_logger,
+            metadata_ttl_seconds=self.metadata_cache_days * 86400,
+            live_ttl_seconds=self.live_metadata_cache_minutes * 60,
+            failed_ttl_seconds=self.failed_metadata_cache_hours * 3600,
+        )
+        self.scratch_space = ScratchSpace(self.general_logger, self.scratch_max_age_hours * 3600, self.scratch_max_size_gb * 1024**3)
+        self.retry_queue = RetryQueue(self.database, self.general_logger, self.retry_max_attempts, self.retry_base_minutes * 60, self.retry_max_hours * 3600, self.retry_permanent_days * 86400)
+        self.upload_history = UploadHistory(self.database, self.general_logger, self.adaptive_max_staleness_hours * 3600, self.adaptive_sync_threshold)
+        self.channel_feed_monitor = ChannelFeedMonitor(self.database, self.general_logger, self.youtube_feed_url, self.feed_max_skip_hours * 3600)
+        self.media_server_notifier = MediaServerNotifier(self.general_logger, self.media_server_debounce_seconds, self.media_server_debounce_seconds * 10)
+        self.channel_update_publisher = ChannelUpdatePublisher(lambda event, data: socketio.emit(event, data), self.channel_update_interval_seconds)
+        self.download_progress = DownloadProgressTracker(lambda event, data: socketio.emit(event, data), self.general_logger, self.progress_update_interval_seconds)
+
         self.sync_start_times = []
+        self.schedule_wake_event = threading.Event()
+        self.retention_wake_event = threading.Event()
+        self.schedule_changed = True
+        self.next_channel_run_times = {}
+        self.overrun_channel_links = set()
+        self.active_download_queues = set()
+        self.download_slots = threading.BoundedSemaphore(self.thread_limit)
         self.settings_config_file = os.path.join(self.config_folder, "settings_config.json")
 
         self.req_channel_list = []
+        self.channel_lock = threading.RLock()
         self.channel_list_config_file = os.path.join(self.config_folder, "channel_list.json")
 
-        if os.path.exists(self.settings_config_file):
-            self.load_settings_from_file()
+        self.migrate_json_config()
+        self.load_settings()
+        self.load_channel_list()
 
-        if os.path.exists(self.channel_list_config_file):
-            self.load_channel_list_from_file()
+        self.configure_media_server_notifier()
+        tracer.configure(os.path.join(self.config_folder, "traces"), self.trace_retention, self.trace_syncs)
 
         full_cookies_path = os.path.join(self.config_folder, "cookies.txt")
         self.cookies_path = full_cookies_path if os.path.exists(full_cookies_path) else None
 
+        self.youtube_dl_pool = YoutubeDLPool(max_idle_per_profile=max(self.discovery_thread_limit * self.extraction_thread_limit, self.thread_limit, self.postprocess_thread_limit))
+        self.youtube_dl_pool.register_profile("flat", self.get_listing_options())
+        self.youtube_dl_pool.register_profile("Video", self.get_download_options("Video")[0])
+        self.youtube_dl_pool.register_profile("Audio", self.get_download_options("Audio")[0])
+        self.youtube_dl_pool.register_profile("Video_postprocess", self.get_postprocess_options("Video"))
+        self.youtube_dl_pool.register_profile("Audio_postprocess", self.get_postprocess_options("Audio"))
+        self.register_metrics()
+
+        if self.background_tasks:
+            self.start_background_tasks()
+
+    def start_background_tasks(self):
         task_thread = threading.Thread(target=self.schedule_checker, daemon=True)
         task_thread.start()
 
-    def load_settings_from_file(self):
+        retry_thread = threading.Thread(target=self.retry_checker, daemon=True)
+        retry_thread.start()
+
+        retention_thread = threading.Thread(target=self.retention_checker, daemon=True)
+        retention_thread.start()
+
+        media_server_thread = threading.Thread(target=self.media_server_notifier.run, daemon=True)
+        media_server_thread.start()
+
+        channel_update_thread = threading.Thread(target=self.channel_update_publisher.run, daemon=True)
+        channel_update_thread.start()
+
+        progress_thread = threading.Thread(target=self.download_progress.run, daemon=True)
+        progress_thread.start()
+
+    def register_metrics(self):
+        metrics.describe("channeltube_download_bytes_total", "counter", "Bytes downloaded by media type.")
+        metrics.describe("channeltube_download_throughput_bytes_per_second", "histogram", "Average download speed per item.", buckets=(1e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8))
+        metrics.describe("channeltube_downloads_total", "counter", "Downloads by result.")
+        metrics.describe("channeltube_extractions_avoided_total", "counter", "Video metadata extractions skipped by listing filters.")
+        metrics.describe("channeltube_queue_depth", "gauge", "Items waiting in each queue.")
+        metrics.describe("channeltube_cache_requests_total", "counter", "Cache lookups by cache and result.")
+        metrics.describe("channeltube_cache_hit_ratio", "gauge", "Share of cache lookups that were hits.")
+        metrics.describe("channeltube_media_files_parsed_total", "counter", "Media files whose tags had to be read from disk.")
+        metrics.describe("channeltube_storage_used_bytes", "gauge", "Bytes used by downloaded media, including downloads in progress.")
+        metrics.describe("channeltube_storage_evicted_files_total", "counter", "Files removed early to stay within a storage quota.")
+        metrics.register_collector(self.collect_metrics)
+
+    def collect_metrics(self):
+        cache_counts = {
+            "video_metadata": (self.video_metadata_cache.hits, self.video_metadata_cache.misses),
+            "channel_feed": (metrics.get_value("channeltube_cache_requests_total", cache="channel_feed", result="hit"), metrics.get_value("channeltube_cache_requests_total", cache="channel_feed", result="miss")),
+        }
+        yield "channeltube_cache_requests_total", {"cache": "video_metadata", "result": "hit"}, self.video_metadata_cache.hits
+        yield "channeltube_cache_requests_total", {"cache": "video_metadata", "result": "miss"}, self.video_metadata_cache.misses
+        for cache_name, (hits, misses) in cache_counts.items():
+            yield "channeltube_cache_hit_ratio", {"cache": cache_name}, hits / (hits + misses) if hits + misses else 0
+
+        yield "channeltube_queue_depth", {"queue": "download"}, sum(len(download_queue) for download_queue in list(self.active_download_queues))
+        yield "channeltube_queue_depth", {"queue": "retry"}, self.retry_queue.get_pending_count()
+        yield "channeltube_media_files_parsed_total", {}, self.media_index.files_parsed
+        yield "channeltube_storage_used_bytes", {}, self.storage_budget.get_usage()
+
+    def migrate_json_config(self):
+        try:
+            if os.path.exists(self.settings_config_file) and not self.config_store.has_settings():
+                with open(self.settings_config_file, "r") as json_file:
+                    self.config_store.save_settings(json.load(json_file))
+                os.replace(self.settings_config_file, f"{self.settings_config_file}.migrated")
+                self.general_logger.warning(f"Migrated settings from {self.settings_config_file}")
+
+            if os.path.exists(self.channel_list_config_file) and not self.config_store.has_channels():
+                with open(self.channel_list_config_file, "r") as json_file:
+                    channels = json.load(json_file)
+                sorted_channels = sorted(channels, key=lambda channel: channel.get("Name", "").lower())
+                self.config_store.insert_channels([self.build_channel_record(channel, idx) for idx, channel in enumerate(sorted_channels)])
+                os.replace(self.channel_list_config_file, f"{self.channel_list_config_file}.migrated")
+                self.general_logger.warning(f"Migrated {len(sorted_channels)} channels from {self.channel_list_config_file}")
+
+        except Exception as e:
+            self.general_logger.error(f"Error Migrating Config: {str(e)}")
+
+    def load_settings(self):
         try:
-            with open(self.settings_config_file, "r") as json_file:
-                ret = json.load(json_file)
-            self.sync_start_times = ret["sync_start_times"]
-            self.media_server_addresses = ret["media_server_addresses"]
-            self.media_server_tokens = ret["media_server_tokens"]
-            self.media_server_library_name = ret["media_server_library_name"]
+            settings = self.config_store.load_settings()
+            self.sync_start_times = settings.get("sync_start_times", self.sync_start_times)
+            self.media_server_addresses = settings.get("media_server_addresses", self.media_server_addresses)
+            self.media_server_tokens = settings.get("media_server_tokens", self.media_server_tokens)
+            self.media_server_library_name = settings.get("media_server_library_name", self.media_server_library_name)
+            self.trace_syncs = settings.get("trace_syncs", self.trace_syncs)
 
         except Exception as e:
             self.general_logger.error(f"Error Loading Config: {str(e)}")
 
-    def save_settings_to_file(self):
+    def save_settings_to_store(self):
         try:
-            with open(self.settings_config_file, "w") as json_file:
-                json.dump(
-                    {
-                        "sync_start_times": self.sync_start_times,
-                        "media_server_addresses": self.media_server_addresses,
-                        "media_server_tokens": self.media_server_tokens,
-                        "media_server_library_name": self.media_server_library_name,
-                    },
-                    json_file,
-                    indent=4,
-                )
+            self.config_store.save_settings(
+                {
+                    "sync_start_times": self.sync_start_times,
+                    "media_server_addresses": self.media_server_addresses,
+                    "media_server_tokens": self.media_server_tokens,
+                    "media_server_library_name": self.media_server_library_name,
+                    "trace_syncs": self.trace_syncs,
+                }
+            )
 
         except Exception as e:
             self.general_logger.error(f"Error Saving Config: {str(e)}")
@@ -106,101 +1638,320 @@ class DataHandler:
         else:
             self.general_logger.warning(f"Settings Saved.")
 
-    def load_channel_list_from_file(self):
+    def load_channel_list(self):
         try:
-            with open(self.channel_list_config_file, "r") as json_file:
-                channels = json.load(json_file)
+            channels = self.config_store.load_channels()
             sorted_channels = sorted(channels, key=lambda channel: channel.get("Name", "").lower())
-
-            for idx, channel in enumerate(sorted_channels):
-                synced_state = channel.get("Last_Synced", "Never")
-                synced_state = "Incomplete" if synced_state in ["In Progress", "Failed", "Queued"] else synced_state
-                full_channel_data = {
-                    "Id": idx,
-                    "Name": channel.get("Name", ""),
-                    "Link": channel.get("Link", ""),
-                    "DL_Days": channel.get("DL_Days", 0),
-                    "Keep_Days": channel.get("Keep_Days", 0),
-                    "Last_Synced": synced_state,
-                    "Item_Count": channel.get("Item_Count", 0),
-                    "Filter_Title_Text": channel.get("Filter_Title_Text", ""),
-                    "Negate_Filter": channel.get("Negate_Filter", False),
-                    "Media_Type": channel.get("Media_Type", "Video"),
-                    "Search_Limit": channel.get("Search_Limit", ""),
-                    "Live_Rule": channel.get("Live_Rule", "Ignore"),
-                }
-
-                self.req_channel_list.append(full_channel_data)
+            with self.channel_lock:
+                self.req_channel_list[:] = [self.build_channel_record(channel, channel["Id"]) for channel in sorted_channels]
 
         except Exception as e:
             self.general_logger.error(f"Error Loading Channels: {str(e)}")
 
-    def save_channel_list_to_file(self):
-        try:
-            with open(self.channel_list_config_file, "w") as json_file:
-                json.dump(self.req_channel_list, json_file, indent=4)
-
-        except Exception as e:
-            self.general_logger.error(f"Error Saving Channels: {str(e)}")
+    def build_channel_record(self, channel, channel_id):
+        synced_state = channel.get("Last_Synced", "Never")
+        synced_state = "Incomplete" if synced_state in ["In Progress", "Failed", "Queued"] else synced_state
+        return {
+            "Id": channel_id,
+            "Name": channel.get("Name", ""),
+            "Link": channel.get("Link", ""),
+            "DL_Days": channel.get("DL_Days", 0),
+            "Keep_Days": channel.get("Keep_Days", 0),
+            "Last_Synced": synced_state,
+            "Item_Count": channel.get("Item_Count", 0),
+            "Filter_Title_Text": channel.get("Filter_Title_Text", ""),
+            "Negate_Filter": channel.get("Negate_Filter", False),
+            "Media_Type": channel.get("Media_Type", "Video"),
+            "Search_Limit": channel.get("Search_Limit", ""),
+            "Live_Rule": channel.get("Live_Rule", "Ignore"),
+            "Channel_Id": channel.get("Channel_Id", ""),
+            "Channel_Title": channel.get("Channel_Title", ""),
+            "Sync_Schedule": channel.get("Sync_Schedule", ""),
+            "Quota_GB": channel.get("Quota_GB", 0),
+        }
 
     def schedule_checker(self):
-        self.general_logger.warning("Starting periodic checks every 10 minutes to monitor sync start times.")
-        self.general_logger.warning(f"Current scheduled hours to start sync (in 24-hour format): {self.sync_start_times}")
+        self.general_logger.warning("Scheduler started.")
+        self.general_logger.warning(f"Current sync schedule: {format_sync_schedule(self.sync_start_times) or 'None'}")
         while True:
-            current_time = datetime.datetime.now()
-            within_sync_window = current_time.hour in self.sync_start_times
+            try:
+                current_time = datetime.datetime.now()
+                if self.schedule_changed:
+                    self.schedule_changed = False
+                    self.next_channel_run_times = {link: run_time for link, run_time in self.next_channel_run_times.items() if link in self.overrun_channel_links or (run_time and run_time <= current_time)}
+
+                due_channels = []
+                for channel in list(self.req_channel_list):
+                    if channel["Link"] not in self.next_channel_run_times:
+                        self.next_channel_run_times[channel["Link"]] = self.get_next_channel_run_time(channel, current_time)
+                    next_run_time = self.next_channel_run_times[channel["Link"]]
+                    if next_run_time and next_run_time <= current_time:
+                        due_channels.append(channel)
+
+                if due_channels:
+                    self.general_logger.warning(f"Time to Start Sync - {len(due_channels)} channels scheduled at {current_time.strftime('%H:%M')}")
+                    channels_to_sync = self.upload_history.prioritise_channels(due_channels) if self.adaptive_sync else due_channels
+                    if channels_to_sync:
+                        self.master_queue(channels_to_sync)
+
+                    completed_time = datetime.datetime.now()
+                    for channel in due_channels:
+                        missed_run_time = self.get_next_channel_run_time(channel, current_time)
+                        if missed_run_time and missed_run_time <= completed_time:
+                            self.general_logger.warning(f'Sync for {channel["Name"]} ran past its next scheduled time, starting it again now.')
+                            self.next_channel_run_times[channel["Link"]] = completed_time
+                            self.overrun_channel_links.add(channel["Link"])
+                        else:
+                            self.next_channel_run_times[channel["Link"]] = missed_run_time
+                            self.overrun_channel_links.discard(channel["Link"])
+                    continue
 
-            if within_sync_window:
-                self.general_logger.warning(f"Time to Start Sync - as current hour: {current_time.hour} in schedule {str(self.sync_start_times)}")
-                self.master_queue()
+                current_links = {channel["Link"] for channel in self.req_channel_list}
+                upcoming_run_times = [run_time for link, run_time in self.next_channel_run_times.items() if run_time and link in current_links]
+                if upcoming_run_times:
+                    next_run_time = min(upcoming_run_times)
+                    sleep_seconds = min(max((next_run_time - datetime.datetime.now()).total_seconds(), 0), 3600)
+                    self.general_logger.info(f"Next sync at {next_run_time} - sleeping for {int(sleep_seconds)} seconds")
+                else:
+                    sleep_seconds = 3600
 
-                current_time = datetime.datetime.now()
-                next_hour = (current_time + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=1)
-                sleep_seconds = (next_hour - current_time).total_seconds()
+            except Exception as e:
+                self.general_logger.error(f"Error in Scheduler: {str(e)}")
+                sleep_seconds = 60
 
-                self.general_logger.warning(f"Sync Complete - Sleeping for {int(sleep_seconds)} seconds until {next_hour.time()}")
-                time.sleep(sleep_seconds)
-                self.general_logger.warning(f"Checking sync schedule every 10 minutes: {str(self.sync_start_times)}")
+            if self.schedule_wake_event.wait(timeout=sleep_seconds):
+                self.schedule_wake_event.clear()
 
-            else:
-                time.sleep(600)
+    def retry_checker(self):
+        while True:
+            try:
+                expired_count = self.retry_queue.purge_permanent_failures()
+                if expired_count:
+                    self.general_logger.warning(f"Removed {expired_count} failed downloads older than {self.retry_permanent_days:g} days from the retry queue.")
 
-    def get_list_of_videos_from_youtube(self, channel, current_channel_files):
-        days_to_retrieve = channel["DL_Days"]
-        channel_link = channel["Link"]
+                due_entries = self.retry_queue.get_due_entries()
+                if due_entries:
+                    self.run_download_pipeline(functools.partial(self.queue_retries, due_entries))
+
+                next_attempt_at = self.retry_queue.get_next_attempt_time()
+                sleep_seconds = min(max(next_attempt_at - time.time(), 1), 3600) if next_attempt_at else 3600
+
+            except Exception as e:
+                self.general_logger.error(f"Error in Retry Queue: {str(e)}")
+                sleep_seconds = 60
+
+            if self.retry_queue.wake_event.wait(timeout=sleep_seconds):
+                self.retry_queue.wake_event.clear()
+
+    def queue_retries(self, due_entries, download_queue):
+        channels_by_link = {channel["Link"]: channel for channel in self.req_channel_list}
+        entries_by_link = {}
+        for entry in due_entries:
+            if entry["channel_link"] not in channels_by_link:
+                self.retry_queue.remove_channel(entry["channel_link"])
+                continue
+            entries_by_link.setdefault(entry["channel_link"], []).append(entry)
+
+        for channel_link, channel_entries in entries_by_link.items():
+            channel = channels_by_link[channel_link]
+            try:
+                channel_folder_path = self.get_channel_folder_path(channel)
+                os.makedirs(channel_folder_path, exist_ok=True)
+
+            except Exception as e:
+                self.general_logger.error(f'Error retrying downloads for channel {channel["Name"]}: {str(e)}')
+                continue
+
+            channel_job = {"channel": channel, "channel_folder_path": channel_folder_path, "remaining": len(channel_entries), "lock": threading.Lock(), "finalise": self.finalise_retried_channel}
+            for entry in channel_entries:
+                self.general_logger.warning(f'Retrying download of {entry["item"]["title"]} (attempt {entry["attempts"] + 1}, last error: {entry["error_class"]})')
+                download_queue.put(channel["Id"], (channel_job, entry["item"]))
+
+    def finalise_retried_channel(self, channel, channel_folder_path):
+        self.update_channel_state(channel, Item_Count=self.count_media_files(channel_folder_path))
+        self.retention_wake_event.set()
+        self.media_server_notifier.notify(channel["Name"])
+
+    def clear_failed_downloads(self):
+        cleared_count = self.retry_queue.clear_permanent_failures()
+        self.general_logger.warning(f"Cleared {cleared_count} failed downloads from the retry queue.")
+        socketio.emit("settings_save_message", f"Cleared {cleared_count} failed downloads, they will be tried again on the next sync.")
+
+    def retention_checker(self):
+        while True:
+            try:
+                next_expiry = None
+                for channel in list(self.req_channel_list):
+                    if channel.get("Last_Synced") in ["In Progress", "Queued"]:
+                        continue
+
+                    channel_expiry = self.remove_expired_files(channel)
+                    if channel_expiry is not None:
+                        next_expiry = channel_expiry if next_expiry is None else min(next_expiry, channel_expiry)
+
+                sleep_seconds = min(max(next_expiry - time.time(), 1), 3600) if next_expiry is not None else 3600
+                if next_expiry is not None:
+                    self.general_logger.info(f"Next file expiry at {datetime.datetime.fromtimestamp(next_expiry)} - sleeping for {int(sleep_seconds)} seconds")
+
+            except Exception as e:
+                self.general_logger.error(f"Error in Retention Checker: {str(e)}")
+                sleep_seconds = 60
+
+            if self.retention_wake_event.wait(timeout=sleep_seconds):
+                self.retention_wake_event.clear()
+
+    def remove_expired_files(self, channel, during_sync=False):
+        days_to_keep = channel["Keep_Days"]
+        if days_to_keep == PERMANENT_RETENTION:
+            if during_sync:
+                self.general_logger.warning(f"Skipping cleanup for channel: {channel['Name']} due to permanent retention policy.")
+            return None
+
+        channel_folder_path = self.get_channel_folder_path(channel)
+        retention_seconds = days_to_keep * 86400
+        expired_files = self.media_index.get_expired_files(channel_folder_path, channel["Media_Type"], time.time() - retention_seconds)
+        if expired_files:
+            subtitle_filenames = [filename for filename in os.listdir(channel_folder_path) if filename.lower().endswith(".srt")] if os.path.isdir(channel_folder_path) else []
+            removed_paths = [entry["path"] for entry in expired_files if self.remove_expired_file(entry, subtitle_filenames, f'as it is {int((time.time() - entry["downloaded_at"]) // 86400)} days old')]
+            self.media_index.remove_files(removed_paths)
+            if removed_paths:
+                self.media_server_notifier.record_change(channel["Name"])
+
+            if not during_sync:
+                self.update_channel_state(channel, Item_Count=self.count_media_files(channel_folder_path))
+                self.media_server_notifier.notify(channel["Name"])
+
+        if during_sync and self.subtitles == "external" and os.path.isdir(channel_folder_path):
+            self.remove_orphaned_subtitles(channel, channel_folder_path, time.time() - retention_seconds)
+
+        oldest_download_time = self.media_index.get_oldest_download_time(channel_folder_path, channel["Media_Type"])
+        return oldest_download_time + retention_seconds if oldest_download_time is not None else None
+
+    def remove_expired_file(self, entry, subtitle_filenames, reason):
+        file_base_name = os.path.splitext(os.path.basename(entry["path"]))[0]
+        sidecar_paths = [os.path.join(entry["folder"], filename) for filename in subtitle_filenames if file_base_name in self.get_subtitle_media_names(filename)]
+
+        for file_path in [entry["path"]] + sidecar_paths:
+            try:
+                os.remove(file_path)
+                self.general_logger.warning(f"Deleted: {os.path.basename(file_path)} {reason}.")
+
+            except FileNotFoundError:
+                self.general_logger.info(f"File: {os.path.basename(file_path)} was already removed.")
+
+            except Exception as e:
+                self.general_logger.error(f"Error Cleaning Old Files: {os.path.basename(file_path)} {str(e)}")
+                if file_path == entry["path"]:
+                    return False
+
+        return True
+
+    def remove_orphaned_subtitles(self, channel, channel_folder_path, cutoff_timestamp):
+        media_base_names = {os.path.splitext(os.path.basename(file_path))[0] for file_path in self.media_index.get_folder_paths(channel_folder_path)}
+        for filename in os.listdir(channel_folder_path):
+            subtitle_media_names = self.get_subtitle_media_names(filename)
+            if not subtitle_media_names or subtitle_media_names & media_base_names:
+                continue
+
+            file_path = os.path.join(channel_folder_path, filename)
+            try:
+                subtitle_mtime = os.path.getmtime(file_path)
+                if subtitle_mtime < cutoff_timestamp:
+                    os.remove(file_path)
+                    self.general_logger.warning(f"Deleted: {filename} as it is {int((time.time() - subtitle_mtime) // 86400)} days old and has no matching media file.")
+                    self.media_server_notifier.record_change(channel["Name"])
+
+            except Exception as e:
+                self.general_logger.error(f"Error Cleaning Old Files: {filename} {str(e)}")
+
+    def get_subtitle_media_names(self, filename):
+        if not filename.lower().endswith(".srt"):
+            return set()
+
+        subtitle_stem = filename[:-4]
+        media_names = {subtitle_stem}
+        media_stem, _, language = subtitle_stem.rpartition(".")
+        if media_stem and SUBTITLE_LANGUAGE_PATTERN.match(language):
+            media_names.add(media_stem)
+        return media_names
+
+    def get_channel_folder_path(self, channel):
+        return os.path.join(self.audio_download_folder, channel["Name"]) if channel["Media_Type"] == "Audio" else os.path.join(self.download_folder, channel["Name"])
+
+    def get_next_channel_run_time(self, channel, after):
+        schedule_entries = self.sync_start_times
+        if channel.get("Sync_Schedule"):
+            try:
+                schedule_entries = parse_sync_schedule(channel["Sync_Schedule"])
+            except Exception as e:
+                self.general_logger.error(f'Invalid sync schedule for channel {channel["Name"]}: {str(e)}')
+
+        jitter = datetime.timedelta(seconds=zlib.crc32(channel["Link"].encode()) % max(1, int(self.sync_jitter_minutes * 60))) if self.sync_jitter_minutes > 0 else datetime.timedelta()
+        run_times = [cron_expression.next_run_time(after - jitter) for cron_expression in build_cron_expressions(schedule_entries)]
+        run_times = [run_time for run_time in run_times if run_time]
+        return min(run_times) + jitter if run_times else None
+
+    def wake_scheduler(self):
+        self.schedule_changed = True
+        self.schedule_wake_event.set()
+
+    def get_list_of_videos_from_youtube(self, channel, current_channel_files, discovery_report=None):
+        discovery_report = {} if discovery_report is None else discovery_report
+        discovery_report.setdefault("recheck_required", False)
         search_limit = channel["Search_Limit"]
-        video_to_download_list = []
 
-        ydl_opts = {
-            "quiet": True,
-            "extract_flat": True,
-            "ffmpeg_location": "/usr/bin/ffmpeg",
-            "verbose": self.verbose_logs,
-        }
-        if search_limit:
-            ydl_opts["playlist_items"] = f"1-{search_limit}"
-        if self.cookies_path:
-            ydl_opts["cookiefile"] = self.cookies_path
-        ydl = yt_dlp.YoutubeDL(ydl_opts)
+        if self.stream_playlists:
+            with self.youtube_dl_pool.acquire("flat") as ydl:
+                playlist, channel_title = self.get_channel_playlist(channel, ydl, process=False)
+                playlist_entries = metrics.time_iterator("playlist_paging", playlist.get("entries") or [])
+                if search_limit:
+                    playlist_entries = itertools.islice(playlist_entries, int(search_limit))
+                return self.select_videos_from_playlist(channel, channel_title, playlist_entries, current_channel_files, discovery_report)
+
+        playlist_items = f"1-{search_limit}" if search_limit else None
+        with self.youtube_dl_pool.acquire("flat", {"playlist_items": playlist_items}) as ydl:
+            playlist, channel_title = self.get_channel_playlist(channel, ydl, process=True)
+
+        return self.select_videos_from_playlist(channel, channel_title, playlist["entries"], current_channel_files, discovery_report)
+
+    def extract_playlist_info(self, ydl, url, process):
+        playlist_info = ydl.extract_info(url, download=False, process=process)
+        while not process and playlist_info.get("_type") in ("url", "url_transparent"):
+            playlist_info = ydl.extract_info(playlist_info["url"], download=False, process=False)
+        return playlist_info
+
+    def get_channel_playlist(self, channel, ydl, process):
+        channel_link = channel["Link"]
 
         if "playlist?list" in channel_link.lower():
-            playlist = ydl.extract_info(channel_link, download=False)
+            with metrics.time_stage("playlist_listing", channel=channel["Name"]):
+                playlist = self.extract_playlist_info(ydl, channel_link, process)
             channel_title = playlist.get("title")
             channel_name = playlist.get("channel")
             channel_id = playlist.get("channel_id")
             self.general_logger.warning(f"Playlist Title: {channel_title} from Channel: {channel_name} and Channel ID: {channel_id}")
+            playlist_id = urllib.parse.parse_qs(urllib.parse.urlparse(channel_link).query).get("list", [None])[0]
+            self.channel_feed_monitor.set_feed_source(channel_link, playlist_id=playlist_id)
 
         else:
-            channel_info = ydl.extract_info(channel_link, download=False)
-            channel_id = channel_info.get("channel_id")
-            channel_title = channel_info.get("title")
+            channel_id = channel.get("Channel_Id")
+            channel_title = channel.get("Channel_Title")
+
+            if not (channel_id and channel_title):
+                with metrics.time_stage("channel_resolution", channel=channel["Name"]):
+                    channel_info = self.extract_playlist_info(ydl, channel_link, process)
+                channel_id = channel_info.get("channel_id")
+                channel_title = channel_info.get("title")
 
-            if not channel_id:
-                raise Exception("No Channel ID")
-            if not channel_title:
-                raise Exception("No Channel Title")
+                if not channel_id:
+                    raise Exception("No Channel ID")
+                if not channel_title:
+                    raise Exception("No Channel Title")
+
+                self.update_channel_state(channel, Channel_Id=channel_id, Channel_Title=channel_title)
 
             self.general_logger.warning(f"Channel Title: {channel_title} and Channel ID: {channel_id}")
+            self.channel_feed_monitor.set_feed_source(channel_link, channel_id=channel_id)
 
             if channel["Live_Rule"] == "Only":
                 self.general_logger.warning(f"Getting list of live videos for channel: {channel_title}")
@@ -209,47 +1960,123 @@ class DataHandler:
                 self.general_logger.warning(f"Getting list of videos for channel: {channel_title}")
                 playlist_url = f"https://www.youtube.com/playlist?list=UU{channel_id[2:]}"
 
-            playlist = ydl.extract_info(playlist_url, download=False)
+            with metrics.time_stage("playlist_listing", channel=channel["Name"]):
+                playlist = self.extract_playlist_info(ydl, playlist_url, process)
+
+        return playlist, channel_title
+
+    def select_videos_from_playlist(self, channel, channel_title, playlist_entries, current_channel_files, discovery_report):
+        days_to_retrieve = channel["DL_Days"]
+        video_to_download_list = []
 
         today = datetime.datetime.now()
         cutoff_date = today - datetime.timedelta(days=days_to_retrieve)
 
-        for video in playlist["entries"]:
+        discovery_report["extractions_avoided"] = 0
+        candidate_videos = self.get_candidate_videos(channel, playlist_entries, current_channel_files, cutoff_date, discovery_report)
+
+        def fetch_video_metadata(candidate_video):
+            video_metadata = self.video_metadata_cache.get(candidate_video["id"])
+            if video_metadata:
+                self.general_logger.warning(f'Using cached info for: {candidate_video["title"]} -> Duration: {candidate_video["duration"]} seconds')
+                return video_metadata
+
+            self.general_logger.warning(f'Extracting info for: {candidate_video["title"]} -> Duration: {candidate_video["duration"]} seconds')
             try:
-                video_title = f'{video["title"]} [{video["id"]}]' if self.include_id_in_filename else video["title"]
-                video_link = video["url"]
-                duration = 0 if not video["duration"] else video["duration"]
-                youtube_video_id = video["id"]
-                live_status = video.get("live_status")
+                with self.youtube_dl_pool.acquire("flat") as extraction_ydl, metrics.time_stage("video_extraction", video_id=candidate_video["id"]):
+                    video_extracted_info = extraction_ydl.extract_info(candidate_video["link"], download=False)
+            except Exception as e:
+                metrics.record_http_error("extraction", e)
+                self.video_metadata_cache.store_failure(candidate_video["id"], str(e))
+                raise
+            return self.video_metadata_cache.store(candidate_video["id"], video_extracted_info)
+
+        with contextlib.closing(self.iterate_in_order(candidate_videos, fetch_video_metadata, self.extraction_thread_limit)) as video_results:
+            for candidate_video, get_video_metadata in video_results:
+                video_title = candidate_video["title"]
+                video_link = candidate_video["link"]
+                youtube_video_id = candidate_video["id"]
+                live_status = candidate_video["live_status"]
 
-                if channel["Live_Rule"] == "Only" and not live_status:
-                    try:
-                        self.general_logger.warning(f"live_status missing for {video_title}, fetching full metadata...")
-                        full_ydl_opts = {
-                            "quiet": True,
-                            "ffmpeg_location": "/usr/bin/ffmpeg",
-                            "verbose": self.verbose_logs,
-                        }
+                try:
+                    video_metadata = get_video_metadata()
+                    if video_metadata["rejection_reason"] and video_metadata["rejection_reason"].startswith("failed"):
+                        discovery_report["recheck_required"] = True
+                        self.general_logger.warning(f'Skipping video: {video_title} as extraction recently failed ({video_metadata["rejection_reason"]})')
+                        continue
+
+                    if channel["Live_Rule"] == "Only":
+                        if not live_status:
+                            live_status = video_metadata["live_status"]
 
-                        if self.cookies_path:
-                            full_ydl_opts["cookiefile"] = self.cookies_path
+                        if live_status == "is_upcoming":
+                            self.general_logger.warning(f"Skipping upcoming live video: {video_title} - {video_link}")
+                            continue
 
-                        with yt_dlp.YoutubeDL(full_ydl_opts) as full_ydl:
-                            full_video_info = full_ydl.extract_info(video_link, download=False)
+                        if not (live_status == "is_live" or live_status == "post_live"):
+                            self.general_logger.warning(f"Skipping non-live video: {video_title}")
+                            continue
 
-                        live_status = full_video_info.get("live_status")
+                    video_upload_date_raw = video_metadata["upload_date"]
+                    video_upload_date = datetime.datetime.strptime(video_upload_date_raw, "%Y%m%d")
+                    video_timestamp = video_metadata["timestamp"]
+                    self.upload_history.record_upload(channel["Link"], youtube_video_id, video_timestamp)
 
-                    except Exception as e:
-                        self.general_logger.warning(f"Unable to get live status for {video_title}: {e}")
-                        self.general_logger.warning(".... Onto the next Video")
+                    current_time = time.time()
+                    age_in_hours = (current_time - video_timestamp) / 3600
+
+                    if video_upload_date < cutoff_date:
+                        self.video_metadata_cache.mark_rejected(youtube_video_id, "too_old")
+                        self.general_logger.warning(f"Ignoring video: {video_title} as it is older than the cut-off {cutoff_date}.")
+                        self.general_logger.warning("No more videos in date range")
+                        break
+
+                    if age_in_hours < self.defer_hours and live_status is None:
+                        self.video_metadata_cache.mark_rejected(youtube_video_id, "deferred", expires_at=video_timestamp + self.defer_hours * 3600)
+                        discovery_report["recheck_required"] = True
+                        self.general_logger.warning(f"Video: {video_title} is {age_in_hours:.2f} hours old. Waiting until it's older than {self.defer_hours} hours.")
                         continue
 
-                if channel["Live_Rule"] == "Only":
-                    if len(video_to_download_list):
+                    video_to_download_list.append({"title": video_title, "upload_date": video_upload_date, "link": video_link, "id": youtube_video_id, "channel_name": channel_title})
+                    self.general_logger.warning(f"Added video to download list: {video_title} -> {video_link}")
+
+                    if channel["Live_Rule"] == "Only":
                         self.general_logger.warning(f"Live video found for channel: {channel_title}")
                         self.general_logger.warning(f"Downloading first live video and ignoring everything else for channel: {channel_title}")
                         break
 
+                except Exception as e:
+                    discovery_report["recheck_required"] = True
+                    self.general_logger.error(f"Error extracting details of {video_title}: {str(e)}")
+
+        metrics.inc("channeltube_extractions_avoided_total", discovery_report["extractions_avoided"])
+        if discovery_report["extractions_avoided"]:
+            self.general_logger.warning(f'Title and date filters avoided {discovery_report["extractions_avoided"]} metadata extractions for channel: {channel_title}')
+
+        return video_to_download_list
+
+    def get_candidate_videos(self, channel, playlist_entries, current_channel_files, cutoff_date, discovery_report):
+        title_filter = compile_title_filter(channel.get("Filter_Title_Text", ""))
+        approximate_cutoff_timestamp = (cutoff_date - datetime.timedelta(days=1)).timestamp()
+
+        for video in playlist_entries:
+            video_title = video.get("title")
+            try:
+                video_title = f'{video["title"]} [{video["id"]}]' if self.include_id_in_filename else video["title"]
+                video_link = video["url"]
+                duration = 0 if not video.get("duration") else video["duration"]
+                youtube_video_id = video["id"]
+                live_status = video.get("live_status")
+                live_status_pending = channel["Live_Rule"] == "Only" and not live_status
+
+                approximate_timestamp = self.get_approximate_timestamp(video)
+                if approximate_timestamp and approximate_timestamp < approximate_cutoff_timestamp:
+                    discovery_report["extractions_avoided"] += 1
+                    self.general_logger.warning(f"Ignoring video: {video_title} as its listed date is older than the cut-off {cutoff_date}.")
+                    self.general_logger.warning("No more videos in date range")
+                    return
+
+                if channel["Live_Rule"] == "Only" and not live_status_pending:
                     if live_status == "is_upcoming":
                         self.general_logger.warning(f"Skipping upcoming live video: {video_title} - {video_link}")
                         continue
@@ -262,7 +2089,7 @@ class DataHandler:
                     self.general_logger.warning(f"Ignoring live video: {video_title} - {video_link}")
                     continue
 
-                if duration <= self.short_video_cutoff and live_status is None:
+                if duration <= self.short_video_cutoff and live_status is None and not live_status_pending:
                     self.general_logger.warning(f"Ignoring short video (<= {self.short_video_cutoff}s): {video_title} - {video_link}")
                     continue
 
@@ -270,61 +2097,80 @@ class DataHandler:
                     self.general_logger.warning(f"File for video: {video_title} already in folder.")
                     continue
 
-                self.general_logger.warning(f"Extracting info for: {video_title} -> Duration: {duration} seconds")
-                video_extracted_info = ydl.extract_info(video_link, download=False)
-
-                video_upload_date_raw = video_extracted_info["upload_date"]
-                video_upload_date = datetime.datetime.strptime(video_upload_date_raw, "%Y%m%d")
-                video_timestamp = video_extracted_info["timestamp"]
-
-                current_time = time.time()
-                age_in_hours = (current_time - video_timestamp) / 3600
-
-                if video_upload_date < cutoff_date:
-                    self.general_logger.warning(f"Ignoring video: {video_title} as it is older than the cut-off {cutoff_date}.")
-                    self.general_logger.warning("No more videos in date range")
-                    break
-
-                if age_in_hours < self.defer_hours and live_status is None:
-                    self.general_logger.warning(f"Video: {video_title} is {age_in_hours:.2f} hours old. Waiting until it's older than {self.defer_hours} hours.")
+                retry_entry = self.retry_queue.get_entry(youtube_video_id)
+                if retry_entry and retry_entry["permanent"]:
+                    self.general_logger.warning(f'Skipping video: {video_title} as it failed permanently ({retry_entry["error_class"]})')
+                    continue
+                if retry_entry:
+                    self.general_logger.warning(f'Skipping video: {video_title} as it is waiting in the retry queue ({retry_entry["error_class"]})')
                     continue
 
-                if channel.get("Filter_Title_Text"):
-                    if channel["Negate_Filter"] and channel["Filter_Title_Text"].lower() in video_title.lower():
+                if title_filter:
+                    title_matches_filter = title_filter.search(video_title) is not None
+                    if channel["Negate_Filter"] and title_matches_filter:
+                        discovery_report["extractions_avoided"] += 1
                         self.general_logger.warning(f'Skipped video: {video_title} as it contains the filter text: {channel["Filter_Title_Text"]}')
                         continue
 
-                    if not channel["Negate_Filter"] and channel["Filter_Title_Text"].lower() not in video_title.lower():
+                    if not channel["Negate_Filter"] and not title_matches_filter:
+                        discovery_report["extractions_avoided"] += 1
                         self.general_logger.warning(f'Skipped video: {video_title} as it does not contain the filter text: {channel["Filter_Title_Text"]}')
                         continue
 
-                video_to_download_list.append({"title": video_title, "upload_date": video_upload_date, "link": video_link, "id": youtube_video_id, "channel_name": channel_title})
-                self.general_logger.warning(f"Added video to download list: {video_title} -> {video_link}")
+                if live_status_pending:
+                    self.general_logger.warning(f"live_status missing for {video_title}, fetching full metadata...")
+
+                yield {"title": video_title, "link": video_link, "duration": duration, "id": youtube_video_id, "live_status": live_status}
 
             except Exception as e:
                 self.general_logger.error(f"Error extracting details of {video_title}: {str(e)}")
 
-        return video_to_download_list
+    def get_approximate_timestamp(self, video):
+        listed_timestamp = video.get("timestamp") or video.get("release_timestamp")
+        if listed_timestamp:
+            return listed_timestamp
 
-    def get_list_of_files_from_channel_folder(self, channel_folder_path):
+        listed_upload_date = video.get("upload_date")
+        if listed_upload_date:
+            try:
+                return datetime.datetime.strptime(listed_upload_date, "%Y%m%d").timestamp()
+            except ValueError:
+                pass
+
+        return None
+
+    def iterate_in_order(self, items, work_function, max_workers):
+        if max_workers <= 1:
+            for item in items:
+                yield item, functools.partial(work_function, item)
+            return
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        pending = collections.deque()
         try:
-            folder_info = {"id_list": [], "filename_list": []}
-            raw_directory_list = os.listdir(channel_folder_path)
-            for filename in raw_directory_list:
-                file_path = os.path.join(channel_folder_path, filename)
-                if not os.path.isfile(file_path):
-                    continue
+            for item in items:
+                pending.append((item, executor.submit(work_function, item)))
+                if len(pending) >= max_workers:
+                    next_item, next_future = pending.popleft()
+                    yield next_item, next_future.result
 
-                try:
-                    file_base_name, file_ext = os.path.splitext(filename)
-                    if file_ext.lower() in MEDIA_FILE_EXTENSIONS:
-                        folder_info["filename_list"].append(file_base_name)
-                        mp4_file = MP4(file_path)
-                        embedded_video_id = mp4_file.get("\xa9cmt", [None])[0]
-                        folder_info["id_list"].append(embedded_video_id)
+            while pending:
+                next_item, next_future = pending.popleft()
+                yield next_item, next_future.result
 
-                except Exception as e:
-                    self.general_logger.error(f"No video ID present or cannot read it from metadata of {filename}: {e}")
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_list_of_files_from_channel_folder(self, channel_folder_path):
+        try:
+            folder_info = {"id_list": [], "filename_list": []}
+            for entry in self.media_index.scan_folder(channel_folder_path):
+                file_base_name = os.path.splitext(os.path.basename(entry["path"]))[0]
+                folder_info["filename_list"].append(file_base_name)
+                if entry["video_id"]:
+                    folder_info["id_list"].append(entry["video_id"])
 
         except Exception as e:
             self.general_logger.error(f"Error getting list of files for channel folder: {e}")
@@ -354,219 +2200,453 @@ class DataHandler:
 
         return video_item_count + audio_item_count
 
-    def cleanup_old_files(self, channel_folder_path, channel):
-        days_to_keep = channel["Keep_Days"]
-        selected_media_type = channel["Media_Type"]
+    def get_listing_options(self):
+        ydl_opts = {
+            "quiet": True,
+            "extract_flat": True,
+            "extractor_args": {"youtubetab": {"approximate_date": [""]}},
+            "ffmpeg_location": "/usr/bin/ffmpeg",
+            "verbose": self.verbose_logs,
+        }
+        if self.cookies_path:
+            ydl_opts["cookiefile"] = self.cookies_path
 
-        if days_to_keep == PERMANENT_RETENTION:
-            self.general_logger.warning(f"Skipping cleanup for channel: {channel['Name']} due to permanent retention policy.")
+        return ydl_opts
+
+    def get_download_options(self, selected_media_type):
+        post_processors = []
+
+        if selected_media_type == "Video":
+            selected_ext = "mp4"
+            selected_format = f"{self.video_format_id}+{self.audio_format_id}/bestvideo[vcodec^={self.fallback_vcodec}]+bestaudio[acodec^={self.fallback_acodec}]/bestvideo+bestaudio/best"
+            merge_output_format = selected_ext
+
+        else:
+            selected_ext = "m4a"
+            selected_format = f"{self.audio_format_id}/bestaudio[acodec^={self.fallback_acodec}]/bestaudio"
+            merge_output_format = None
+
+        ydl_opts = {
+            "logger": self.general_logger,
+            "ffmpeg_location": "/usr/bin/ffmpeg",
+            "format": selected_format,
+            "quiet": True,
+            "writethumbnail": True,
+            "progress_hooks": [self.progress_callback],
+            "postprocessor_hooks": [self.postprocessor_callback],
+            "postprocessors": post_processors,
+            "no_mtime": True,
+            "live_from_start": True,
+            "extractor_args": {"youtubetab": {"skip": ["authcheck"]}},
+            "verbose": self.verbose_logs,
+        }
+
+        if self.subtitles in ["embed", "external"]:
+            ydl_opts.update(
+                {
+                    "subtitlesformat": "best",
+                    "writeautomaticsub": True,
+                    "writesubtitles": True,
+                    "subtitleslangs": self.subtitle_languages,
+                }
+            )
+            if self.subtitles == "external":
+                post_processors.extend([{"key": "FFmpegSubtitlesConvertor", "format": "srt", "when": "before_dl"}])
+
+        if merge_output_format:
+            ydl_opts["merge_output_format"] = merge_output_format
+        if self.cookies_path:
+            ydl_opts["cookiefile"] = self.cookies_path
+
+        return ydl_opts, selected_ext
+
+    def get_postprocess_options(self, selected_media_type):
+        post_processors = [
+            {"key": "SponsorBlock", "categories": ["sponsor"]},
+            {"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]},
+        ]
+
+        if selected_media_type == "Audio":
+            post_processors.append(
+                {
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": "m4a",
+                    "preferredquality": 0,
+                }
+            )
+
+        post_processors.extend(
+            [
+                {"key": "FFmpegMetadata"},
+                {"key": "EmbedThumbnail"},
+            ]
+        )
+
+        if self.subtitles == "embed":
+            post_processors.extend([{"key": "FFmpegEmbedSubtitle", "already_have_subtitle": False}])
+
+        return {
+            "logger": self.general_logger,
+            "ffmpeg_location": "/usr/bin/ffmpeg",
+            "quiet": True,
+            "postprocessors": post_processors,
+            "postprocessor_hooks": [self.postprocessor_callback],
+            "verbose": self.verbose_logs,
+        }
+
+    def download_item(self, item, channel_folder_path, channel):
+        self.general_logger.warning(f'Starting download: {item["title"]}')
+        self.download_progress.start_item(item["id"], item["title"], channel["Name"])
+        link = item["link"]
+        scratch_directory = None
+
+        try:
+            cleaned_title = self.string_cleaner(item["title"])
+            selected_media_type = channel["Media_Type"]
+            root_folder = self.audio_download_folder if selected_media_type == "Audio" else self.download_folder
+            download_profile = f'{selected_media_type}:{self.youtube_dl_pool.option_profiles[selected_media_type]["format"]}'
+            scratch_directory = self.scratch_space.open_directory(root_folder, item["id"], download_profile)
+
+            item_params = {
+                "paths": {"home": scratch_directory, "temp": scratch_directory},
+                "outtmpl": {"default": f"{cleaned_title}.%(ext)s"},
+            }
+            with self.youtube_dl_pool.acquire(selected_media_type, item_params) as yt_downloader:
+                with metrics.time_stage("format_selection", video_id=item["id"], title=item["title"]):
+                    video_info = yt_downloader.extract_info(link, download=False)
+
+                with metrics.time_stage("storage_admission", video_id=item["id"], title=item["title"]):
+                    self.admit_download(item, channel, channel_folder_path, self.estimate_download_size(video_info))
+
+                with metrics.time_stage("download", video_id=item["id"], title=item["title"]):
+                    self.general_logger.warning(f"yt_dlp -> Starting to download: {link}")
+                    download_started_at = time.perf_counter()
+                    try:
+                        video_info = yt_downloader.process_ie_result(video_info, download=True)
+
+                    finally:
+                        tracer.end_open_events()
+                    download_seconds = time.perf_counter() - download_started_at
+                    self.general_logger.warning(f"yt_dlp -> Finished: {link}")
+
+            downloaded_info = (video_info.get("requested_downloads") or [video_info])[-1]
+            if not downloaded_info.get("filepath"):
+                raise Exception("yt_dlp did not report a downloaded file")
+
+            downloaded_bytes = os.path.getsize(downloaded_info["filepath"])
+            metrics.inc("channeltube_download_bytes_total", downloaded_bytes, media_type=selected_media_type)
+            metrics.observe("channeltube_download_throughput_bytes_per_second", downloaded_bytes / max(download_seconds, 0.001))
+
+            self.download_progress.update_item(item["id"], Phase="Waiting for post-processing", Speed=None, ETA=None, Postprocessor=None)
+            return {
+                "item": item,
+                "channel": channel,
+                "channel_folder_path": channel_folder_path,
+                "scratch_directory": scratch_directory,
+                "downloaded_info": downloaded_info,
+            }
+
+        except Exception as e:
+            self.general_logger.error(f"Error downloading video: {link}. Error message: {e}")
+            self.storage_budget.release(item["id"])
+            metrics.record_http_error("download", e)
+            metrics.inc("channeltube_downloads_total", result="failed")
+            self.retry_queue.record_failure(channel, item, e)
+            self.download_progress.finish_item(item["id"], "Failed")
+            if scratch_directory:
+                self.scratch_space.close_directory(scratch_directory, completed=False)
+            return None
+
+    def estimate_download_size(self, video_info):
+        selected_formats = video_info.get("requested_formats") or [video_info]
+        format_sizes = [selected_format.get("filesize") or selected_format.get("filesize_approx") for selected_format in selected_formats]
+        return int(sum(format_sizes)) if all(format_sizes) else 0
+
+    def admit_download(self, item, channel, channel_folder_path, expected_bytes, hardlink=False):
+        channel_folder_path = os.path.normpath(channel_folder_path)
+        channel_quota_bytes = float(channel.get("Quota_GB") or 0) * 1024**3
+        new_bytes = 0 if hardlink else expected_bytes
+        with self.storage_budget.lock:
+            if channel_quota_bytes:
+                self.make_room(f'channel {channel["Name"]}', [channel_folder_path], channel_quota_bytes, expected_bytes, [channel_folder_path])
+            if self.storage_budget.global_quota_bytes:
+                self.make_room("library", None, self.storage_budget.global_quota_bytes, new_bytes, self.get_evictable_folders())
+            self.storage_budget.reserve(item["id"], channel_folder_path, new_bytes)
+
+    def get_evictable_folders(self):
+        return [os.path.normpath(self.get_channel_folder_path(channel)) for channel in list(self.req_channel_list) if channel["Keep_Days"] != PERMANENT_RETENTION]
+
+    def make_room(self, scope_name, usage_folders, quota_bytes, expected_bytes, eviction_folders):
+        used_bytes = self.storage_budget.get_usage(usage_folders)
+        excess_bytes = used_bytes + expected_bytes - quota_bytes
+        if excess_bytes <= 0:
             return
 
-        current_datetime = datetime.datetime.now()
-        raw_directory_list = os.listdir(channel_folder_path)
-        for filename in raw_directory_list:
-            try:
-                file_path = os.path.join(channel_folder_path, filename)
-                if not os.path.isfile(file_path):
+        if self.storage_budget.policy != "evict" or self.media_index.get_exclusive_size(eviction_folders, usage_folders) < excess_bytes:
+            raise Exception(f"Storage quota for {scope_name} exceeded: {yt_dlp.utils.format_bytes(used_bytes)} used, {yt_dlp.utils.format_bytes(expected_bytes)} needed, quota is {yt_dlp.utils.format_bytes(quota_bytes)}")
+
+        subtitle_filenames = {}
+        failed_paths = set()
+        freed_bytes = 0
+        while freed_bytes < excess_bytes:
+            candidates = [entry for entry in self.media_index.get_eviction_candidates(eviction_folders, usage_folders, limit=len(failed_paths) + 100) if entry["path"] not in failed_paths]
+            if not candidates:
+                raise Exception(f"Storage quota for {scope_name} exceeded: only {yt_dlp.utils.format_bytes(freed_bytes)} of {yt_dlp.utils.format_bytes(excess_bytes)} could be freed")
+
+            for entry in candidates:
+                if entry["folder"] not in subtitle_filenames:
+                    subtitle_filenames[entry["folder"]] = [filename for filename in os.listdir(entry["folder"]) if filename.lower().endswith(".srt")] if os.path.isdir(entry["folder"]) else []
+                if not self.remove_expired_file(entry, subtitle_filenames[entry["folder"]], f"to stay within the storage quota for {scope_name}"):
+                    failed_paths.add(entry["path"])
                     continue
 
-                file_base_name, file_ext = os.path.splitext(filename.lower())
+                self.media_index.remove_files([entry["path"]])
+                metrics.inc("channeltube_storage_evicted_files_total")
+                if entry["link_count"] > 1:
+                    break
+                freed_bytes += entry["size"]
+                if freed_bytes >= excess_bytes:
+                    break
 
-                video_file_check = file_ext in VIDEO_EXTENSIONS and selected_media_type == "Video"
-                audio_file_check = file_ext in AUDIO_EXTENSIONS and selected_media_type == "Audio"
-                subtitle_file_check = file_ext == ".srt" and self.subtitles == "external"
+        for folder_path in subtitle_filenames:
+            self.media_server_notifier.record_change(os.path.basename(folder_path))
+            self.media_server_notifier.notify(os.path.basename(folder_path))
 
-                if not (video_file_check or audio_file_check or subtitle_file_check):
-                    continue
+    def link_existing_download(self, item, channel_folder_path, channel):
+        selected_media_type = channel["Media_Type"]
+        selected_ext = "mp4" if selected_media_type == "Video" else "m4a"
+        target_path = os.path.join(channel_folder_path, f'{self.string_cleaner(item["title"])}.{selected_ext}')
+        if not self.link_duplicates or os.path.exists(target_path):
+            return False
 
-                file_mtime = self.get_file_modification_time(file_path, filename, file_ext)
-                age = current_datetime - file_mtime
+        for entry in self.media_index.find_copies(item["id"], selected_media_type):
+            if entry["folder"] == os.path.normpath(channel_folder_path) or not os.path.isfile(entry["path"]):
+                continue
 
-                if age > datetime.timedelta(days=days_to_keep):
-                    os.remove(file_path)
-                    self.general_logger.warning(f"Deleted: {filename} as it is {age.days} days old.")
-                    self.media_server_scan_req_flag = True
-                else:
-                    self.general_logger.warning(f"File: {filename} is {age.days} days old, keeping file as not over {days_to_keep} days.")
+            download_datetime = datetime.datetime.now().replace(microsecond=0)
+            shares_metadata = self.has_shared_metadata(entry["path"], item, download_datetime)
+            try:
+                self.admit_download(item, channel, channel_folder_path, entry["size"], hardlink=shares_metadata)
 
             except Exception as e:
-                self.general_logger.error(f"Error Cleaning Old Files: {filename} {str(e)}")
+                self.general_logger.error(f'Error linking video: {item["title"]}. Error message: {e}')
+                metrics.inc("channeltube_downloads_total", result="failed")
+                self.retry_queue.record_failure(channel, item, e)
+                return True
+
+            try:
+                try:
+                    link_type = self.clone_file(entry["path"], target_path, allow_hardlink=shares_metadata, allow_copy=self.copy_duplicates)
+
+                except OSError as e:
+                    self.general_logger.info(f'Could not link {entry["path"]} to {target_path}: {e}')
+                    continue
+
+                source_base_name = os.path.splitext(os.path.basename(entry["path"]))[0]
+                target_base_name = os.path.splitext(os.path.basename(target_path))[0]
+                for filename in os.listdir(entry["folder"]):
+                    if source_base_name in self.get_subtitle_media_names(filename):
+                        try:
+                            self.clone_file(os.path.join(entry["folder"], filename), os.path.join(channel_folder_path, f"{target_base_name}{filename[len(source_base_name):]}"), allow_copy=True)
+                        except OSError as e:
+                            self.general_logger.info(f"Could not link subtitle {filename}: {e}")
+
+                if link_type == "hardlink":
+                    self.media_index.record_file(target_path, item["id"], item["title"], download_datetime.timestamp(), selected_media_type)
+                else:
+                    self.add_extra_metadata(target_path, item, selected_media_type, download_datetime)
+
+            finally:
+                self.storage_budget.release(item["id"])
+
+            self.general_logger.warning(f'Created {link_type} of existing download of {item["title"]} from {entry["folder"]} instead of downloading it again.')
+            metrics.inc("channeltube_downloads_total", result="linked")
+            self.retry_queue.record_success(item["id"])
+            self.media_server_notifier.record_change(channel["Name"])
+            return True
+
+        return False
 
-    def get_file_modification_time(self, file_path, filename, file_ext):
+    def has_shared_metadata(self, file_path, item, download_datetime):
         try:
-            if file_ext == ".srt":
-                file_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-                return file_mtime
-
-            mpeg4_file = MP4(file_path)
-            mpeg4_file_created_timestamp = mpeg4_file.get("\xa9day", [None])[0]
-            if mpeg4_file_created_timestamp:
-                file_mtime = datetime.datetime.strptime(mpeg4_file_created_timestamp, "%Y-%m-%d %H:%M:%S")
-                self.general_logger.warning(f"Extracted datetime {file_mtime} from metadata of {filename}")
-                return file_mtime
-            else:
-                raise Exception("No timestamp found")
+            existing_tags = MP4(file_path).tags or {}
 
-        except Exception as e:
-            self.general_logger.warning(f"Error extracting datetime from metadata for {filename}: {e}")
-            file_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-            self.general_logger.warning(f"Using filesystem modified timestamp {file_mtime} for {filename}")
-            return file_mtime
+        except Exception:
+            return False
 
-    def download_items(self, item_list, channel_folder_path, channel):
-        for item in item_list:
-            self.general_logger.warning(f'Starting download: {item["title"]}')
+        return all(existing_tags.get(tag) == [value] for tag, value in self.get_extra_metadata_tags(item, download_datetime).items() if tag != "\xa9day")
 
+    def clone_file(self, source_path, target_path, allow_hardlink=True, allow_copy=False):
+        if allow_hardlink:
             try:
-                temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
-                link = item["link"]
-                cleaned_title = self.string_cleaner(item["title"])
-                selected_media_type = channel["Media_Type"]
-                post_processors = [
-                    {"key": "SponsorBlock", "categories": ["sponsor"]},
-                    {"key": "ModifyChapters", "remove_sponsor_segments": ["sponsor"]},
-                ]
-
-                if selected_media_type == "Video":
-                    selected_ext = "mp4"
-                    selected_format = f"{self.video_format_id}+{self.audio_format_id}/bestvideo[vcodec^={self.fallback_vcodec}]+bestaudio[acodec^={self.fallback_acodec}]/bestvideo+bestaudio/best"
-                    merge_output_format = selected_ext
+                os.link(source_path, target_path)
+                return "hardlink"
 
-                else:
-                    selected_ext = "m4a"
-                    selected_format = f"{self.audio_format_id}/bestaudio[acodec^={self.fallback_acodec}]/bestaudio"
-                    merge_output_format = None
-                    post_processors.append(
-                        {
-                            "key": "FFmpegExtractAudio",
-                            "preferredcodec": selected_ext,
-                            "preferredquality": 0,
-                        }
-                    )
-
-                post_processors.extend(
-                    [
-                        {"key": "FFmpegMetadata"},
-                        {"key": "EmbedThumbnail"},
-                    ]
-                )
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
 
-                folder_and_filename = os.path.join(channel_folder_path, cleaned_title)
-                ydl_opts = {
-                    "paths": {"home": channel_folder_path, "temp": temp_dir.name},
-                    "logger": self.general_logger,
-                    "ffmpeg_location": "/usr/bin/ffmpeg",
-                    "format": selected_format,
-                    "outtmpl": f"{cleaned_title}.%(ext)s",
-                    "quiet": True,
-                    "writethumbnail": True,
-                    "progress_hooks": [self.progress_callback],
-                    "postprocessors": post_processors,
-                    "no_mtime": True,
-                    "live_from_start": True,
-                    "extractor_args": {"youtubetab": {"skip": ["authcheck"]}},
-                    "verbose": self.verbose_logs,
-                }
+        with open(source_path, "rb") as source_file, open(target_path, "xb") as target_file:
+            try:
+                try:
+                    fcntl.ioctl(target_file.fileno(), FICLONE_IOCTL, source_file.fileno())
+                    link_type = "reflink"
+
+                except OSError:
+                    if not allow_copy:
+                        raise
+                    shutil.copyfileobj(source_file, target_file)
+                    link_type = "copy"
+
+            except OSError:
+                target_file.close()
+                os.remove(target_path)
+                raise
+
+        shutil.copystat(source_path, target_path)
+        return link_type
+
+    def post_process_item(self, download_result):
+        item = download_result["item"]
+        channel = download_result["channel"]
+        downloaded_info = download_result["downloaded_info"]
+        selected_media_type = channel["Media_Type"]
+        selected_ext = "mp4" if selected_media_type == "Video" else "m4a"
+        folder_and_filename = os.path.join(download_result["channel_folder_path"], self.string_cleaner(item["title"]))
+        completed = False
 
-                if self.subtitles in ["embed", "external"]:
-                    ydl_opts.update(
-                        {
-                            "subtitlesformat": "best",
-                            "writeautomaticsub": True,
-                            "writesubtitles": True,
-                            "subtitleslangs": self.subtitle_languages,
-                        }
-                    )
-                    if self.subtitles == "embed":
-                        post_processors.extend([{"key": "FFmpegEmbedSubtitle", "already_have_subtitle": False}])
-                    elif self.subtitles == "external":
-                        post_processors.extend([{"key": "FFmpegSubtitlesConvertor", "format": "srt", "when": "before_dl"}])
-
-                if merge_output_format:
-                    ydl_opts["merge_output_format"] = merge_output_format
-                if self.cookies_path:
-                    ydl_opts["cookiefile"] = self.cookies_path
-
-                yt_downloader = yt_dlp.YoutubeDL(ydl_opts)
-                self.general_logger.warning(f"yt_dlp -> Starting to download: {link}")
-
-                yt_downloader.download([link])
-                self.general_logger.warning(f"yt_dlp -> Finished: {link}")
-
-                self.add_extra_metadata(f"{folder_and_filename}.{selected_ext}", item)
+        try:
+            self.general_logger.warning(f'Post-processing: {item["title"]}')
+            self.download_progress.update_item(item["id"], Phase="Post-processing")
+            downloaded_info["__finaldir"] = download_result["channel_folder_path"]
+            download_datetime = datetime.datetime.now().replace(microsecond=0)
+            extra_metadata_tags = self.get_extra_metadata_tags(item, download_datetime)
+            downloaded_info.update({f"meta_{FFMPEG_METADATA_KEYS[tag]}": value for tag, value in extra_metadata_tags.items() if tag in FFMPEG_METADATA_KEYS})
+            subtitle_files = {subtitle["filepath"]: None for subtitle in (downloaded_info.get("requested_subtitles") or {}).values() if subtitle.get("filepath")}
+            with metrics.time_stage("postprocess", video_id=item["id"], title=item["title"]):
+                with self.youtube_dl_pool.acquire(f"{selected_media_type}_postprocess") as post_processor:
+                    try:
+                        post_processor.post_process(downloaded_info["filepath"], downloaded_info, subtitle_files)
 
-            except Exception as e:
-                self.general_logger.error(f"Error downloading video: {link}. Error message: {e}")
+                    finally:
+                        tracer.end_open_events()
+                self.add_extra_metadata(f"{folder_and_filename}.{selected_ext}", item, selected_media_type, download_datetime)
 
-            finally:
-                temp_dir.cleanup()
+            metrics.inc("channeltube_downloads_total", result="completed")
+            self.retry_queue.record_success(item["id"])
+            self.media_server_notifier.record_change(channel["Name"])
+            completed = True
 
-        self.media_server_scan_req_flag = True
+        except Exception as e:
+            self.general_logger.error(f'Error post-processing video: {item["link"]}. Error message: {e}')
+            metrics.inc("channeltube_downloads_total", result="failed")
+            self.retry_queue.record_failure(channel, item, e)
+
+        finally:
+            self.storage_budget.release(item["id"])
+            self.scratch_space.close_directory(download_result["scratch_directory"], completed)
+            self.download_progress.finish_item(item["id"], "Completed" if completed else "Failed")
+
+        return completed
 
     def progress_callback(self, progress_data):
-        status = progress_data.get("status", "unknown")
-        is_live_video = progress_data.get("info_dict", {}).get("is_live", False)
-        fragment_index = progress_data.get("fragment_index", 1)
-        show_live_log_message = fragment_index % 10 == 0
-        elapsed = progress_data.get("elapsed", 1)
-        minutes, seconds = divmod(elapsed, 60)
-
-        if status == "finished":
+        status = progress_data.get("status")
+        info_dict = progress_data.get("info_dict", {})
+
+        if status == "downloading":
+            self.download_progress.update_item(
+                info_dict.get("id"),
+                Downloaded_Bytes=progress_data.get("downloaded_bytes") or 0,
+                Total_Bytes=progress_data.get("total_bytes") or progress_data.get("total_bytes_estimate"),
+                Speed=progress_data.get("speed"),
+                ETA=progress_data.get("eta"),
+                Fragment_Index=progress_data.get("fragment_index"),
+                Is_Live=bool(info_dict.get("is_live")),
+            )
+
+        elif status == "finished":
             self.general_logger.warning("Download complete")
             self.general_logger.warning("Processing file...")
 
-        elif status == "downloading" and is_live_video and show_live_log_message:
-            downloaded_bytes_str = progress_data.get("_downloaded_bytes_str", "0")
-            elapsed_str = f"{int(minutes)} minutes and {int(seconds)} seconds"
-            self.general_logger.warning(f"Live Video - Downloaded: {downloaded_bytes_str} (Fragment Index: {fragment_index}, Elapsed: {elapsed_str})")
-
-        elif status == "downloading" and not is_live_video and int(seconds) % 5 == 0:
-            percent_str = progress_data.get("_percent_str", "unknown")
-            total_bytes_str = progress_data.get("_total_bytes_str", "unknown")
-            speed_str = progress_data.get("_speed_str", "unknown")
-            eta_str = progress_data.get("_eta_str", "unknown")
+    def postprocessor_callback(self, hook_data):
+        status = hook_data.get("status")
+        postprocessor = hook_data.get("postprocessor")
+        video_id = hook_data.get("info_dict", {}).get("id")
+        if status == "started":
+            tracer.begin(postprocessor, "postprocessor", video_id=video_id)
+            self.download_progress.update_item(video_id, Phase="Post-processing", Postprocessor=postprocessor)
+        elif status == "finished":
+            tracer.end(postprocessor, "postprocessor")
+
+    def get_extra_metadata_tags(self, item, download_datetime):
+        return {
+            "\xa9day": download_datetime.strftime(METADATA_TIMESTAMP_FORMAT),
+            "\xa9cmt": item["id"],
+            "\xa9nam": item["title"],
+            "\xa9ART": item["channel_name"],
+            "\xa9gen": item["channel_name"],
+            "\xa9pub": item["channel_name"],
+        }
 
-            self.general_logger.warning(f"Downloaded {percent_str} of {total_bytes_str} at {speed_str} with ETA {eta_str}")
+    def get_in_place_padding(self, padding_info):
+        if padding_info.padding >= 0:
+            return padding_info.padding
+        if padding_info.size > IN_PLACE_TAG_REWRITE_LIMIT:
+            raise Exception(f"tags do not fit in the existing padding and saving would move {padding_info.size} bytes of media data")
+        return padding_info.get_default_padding()
 
-    def add_extra_metadata(self, file_path, item):
+    def add_extra_metadata(self, file_path, item, media_type, download_datetime):
         try:
-            current_datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             m4_file = MP4(file_path)
-            m4_file["\xa9day"] = current_datetime
-            m4_file["\xa9cmt"] = item["id"]
-            m4_file["\xa9nam"] = item["title"]
-            m4_file["\xa9ART"] = item["channel_name"]
-            m4_file["\xa9gen"] = item["channel_name"]
-            m4_file["\xa9pub"] = item["channel_name"]
-            m4_file.save()
-            self.general_logger.warning(f'Added timestamp: {current_datetime} and video ID: {item["id"]} to metadata of: {file_path}')
+            existing_tags = m4_file.tags or {}
+            missing_tags = {tag: value for tag, value in self.get_extra_metadata_tags(item, download_datetime).items() if existing_tags.get(tag) != [value]}
+            index_tags_missing = any(tag in missing_tags for tag in ["\xa9day", "\xa9cmt", "\xa9nam"])
+
+            if missing_tags:
+                for tag, value in missing_tags.items():
+                    m4_file[tag] = value
+                try:
+                    if index_tags_missing:
+                        self.general_logger.warning(f"Post-processing did not tag {file_path}, rewriting file to add metadata")
+                        m4_file.save()
+                    else:
+                        try:
+                            m4_file.save(padding=self.get_in_place_padding)
+                        except Exception as e:
+                            self.general_logger.warning(f"Could not tag {file_path} in place, rewriting file to add metadata: {e}")
+                            m4_file.save()
+                    self.general_logger.warning(f'Added tags: {", ".join(missing_tags)} to metadata of: {file_path}')
+
+                except Exception as e:
+                    if index_tags_missing:
+                        raise
+                    self.general_logger.warning(f'Skipped adding tags: {", ".join(missing_tags)} to {file_path}: {e}')
+
+            self.media_index.record_file(file_path, item["id"], item["title"], download_datetime.timestamp(), media_type)
 
         except Exception as e:
             self.general_logger.error(f"Error adding metadata to {file_path}: {e}")
 
-    def master_queue(self):
+    def master_queue(self, channels_to_sync=None):
+        tracer.start_trace("sync")
+        try:
+            with tracer.span("master_queue"):
+                self.run_sync(channels_to_sync)
+
+        finally:
+            tracer.finish_trace()
+
+    def run_sync(self, channels_to_sync=None):
+        channels_to_sync = list(self.req_channel_list) if channels_to_sync is None else channels_to_sync
         try:
-            self.media_server_scan_req_flag = False
             self.general_logger.warning("Sync Task started...")
+            self.video_metadata_cache.purge_expired()
+            self.scratch_space.collect_garbage([self.download_folder, self.audio_download_folder])
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit) as executor:
-                futures = []
-                for channel in self.req_channel_list:
-                    if channel.get("Last_Synced") not in ["In Progress", "Queued"]:
-                        channel["Last_Synced"] = "Queued"
-                        futures.append(executor.submit(self.process_channel, channel))
-                socketio.emit("update_channel_list", {"Channel_List": self.req_channel_list})
-            concurrent.futures.wait(futures)
-
-            if self.req_channel_list:
-                self.save_channel_list_to_file()
-            else:
-                self.general_logger.warning("Channel list empty")
+            self.run_download_pipeline(functools.partial(self.discover_channels, channels_to_sync))
 
-            if self.media_server_scan_req_flag == True and self.media_server_tokens:
-                self.sync_media_servers()
-            else:
-                self.general_logger.warning("Media Server Sync not required")
+            if not self.req_channel_list:
+                self.general_logger.warning("Channel list empty")
 
         except Exception as e:
             self.general_logger.error(f"Error in Queue: {str(e)}")
@@ -575,99 +2655,193 @@ class DataHandler:
         else:
             self.general_logger.warning("Sync Finished: Complete")
 
+    def run_download_pipeline(self, queue_downloads):
+        download_queue = RoundRobinQueue()
+        postprocess_slots = threading.BoundedSemaphore(self.thread_limit + self.postprocess_thread_limit)
+        self.active_download_queues.add(download_queue)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.postprocess_thread_limit, thread_name_prefix="postprocess") as postprocess_executor:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_limit, thread_name_prefix="download") as download_executor:
+                    download_futures = [download_executor.submit(self.download_worker, download_queue, postprocess_executor, postprocess_slots) for _ in range(self.thread_limit)]
+
+                    try:
+                        queue_downloads(download_queue)
+
+                    finally:
+                        download_queue.close()
+
+                concurrent.futures.wait(download_futures)
+                self.general_logger.warning("Downloads Finished - waiting for post-processing to complete.")
+
         finally:
-            socketio.emit("update_channel_list", {"Channel_List": self.req_channel_list})
+            self.active_download_queues.discard(download_queue)
+
+    def discover_channels(self, channels_to_sync, download_queue):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.discovery_thread_limit, thread_name_prefix="discovery") as discovery_executor:
+            discovery_futures = []
+            for channel in channels_to_sync:
+                with self.channel_lock:
+                    if channel.get("Last_Synced") in ["In Progress", "Queued"]:
+                        continue
+                    self.update_channel_state(channel, Last_Synced="Queued")
+                discovery_futures.append(discovery_executor.submit(self.process_channel, channel, download_queue))
+        concurrent.futures.wait(discovery_futures)
+        self.general_logger.warning(f"Discovery Finished - {len(download_queue)} items waiting to download.")
 
-    def process_channel(self, channel):
+    def process_channel(self, channel, download_queue):
+        with tracer.span("process_channel", channel=channel["Name"]):
+            self.sync_channel(channel, download_queue)
+
+    def sync_channel(self, channel, download_queue):
         try:
-            channel["Last_Synced"] = "In Progress"
-            channel_folder_path = os.path.join(self.audio_download_folder, channel["Name"]) if channel["Media_Type"] == "Audio" else os.path.join(self.download_folder, channel["Name"])
+            self.update_channel_state(channel, Last_Synced="In Progress")
+            channel_folder_path = self.get_channel_folder_path(channel)
             os.makedirs(channel_folder_path, exist_ok=True)
 
             self.general_logger.warning(f'Getting current list of files for channel: {channel["Name"]} from {channel_folder_path}')
-            current_channel_files = self.get_list_of_files_from_channel_folder(channel_folder_path)
-
-            self.general_logger.warning(f'Getting list of videos for channel: {channel["Name"]} from {channel["Link"]}')
-            item_download_list = self.get_list_of_videos_from_youtube(channel, current_channel_files)
-
-            if item_download_list:
-                self.general_logger.warning(f'Downloading video list for: {channel["Name"]}')
-                self.download_items(item_download_list, channel_folder_path, channel)
-                self.general_logger.warning(f'Finished downloading videos for channel: {channel["Name"]}')
+            with metrics.time_stage("folder_scan"):
+                current_channel_files = self.get_list_of_files_from_channel_folder(channel_folder_path)
+
+            with metrics.time_stage("feed_check"):
+                feed_snapshot = self.channel_feed_monitor.check_feed(channel)
+            if feed_snapshot["unchanged"]:
+                metrics.inc("channeltube_cache_requests_total", cache="channel_feed", result="hit")
+                self.general_logger.warning(f'No new uploads in feed for channel: {channel["Name"]}, skipping search for new videos')
+                item_download_list = []
             else:
-                self.general_logger.warning(f'No videos to download for: {channel["Name"]}')
-
-            self.general_logger.warning(f'Clearing Files for: {channel["Name"]}')
-            self.cleanup_old_files(channel_folder_path, channel)
-            self.general_logger.warning(f'Finished Clearing Files for channel: {channel["Name"]}')
+                metrics.inc("channeltube_cache_requests_total", cache="channel_feed", result="miss")
+                self.general_logger.warning(f'Getting list of videos for channel: {channel["Name"]} from {channel["Link"]}')
+                discovery_report = {}
+                with metrics.time_stage("discovery", channel=channel["Name"]):
+                    item_download_list = self.get_list_of_videos_from_youtube(channel, current_channel_files, discovery_report)
+                self.channel_feed_monitor.record_discovery(channel, feed_snapshot, discovery_report["recheck_required"] or bool(item_download_list))
+            self.upload_history.record_check(channel["Link"])
 
-            self.general_logger.warning(f'Counting Files for: {channel["Name"]}')
-            channel["Item_Count"] = self.count_media_files(channel_folder_path)
-            self.general_logger.warning(f'Finished Counting Files for channel: {channel["Name"]}')
+            if item_download_list:
+                self.general_logger.warning(f'Queueing {len(item_download_list)} videos to download for: {channel["Name"]}')
+                channel_job = {"channel": channel, "channel_folder_path": channel_folder_path, "remaining": len(item_download_list), "lock": threading.Lock(), "finalise": self.finalise_channel}
+                for item in item_download_list:
+                    download_queue.put(channel["Id"], (channel_job, item))
+                return
 
-            channel["Last_Synced"] = datetime.datetime.now().strftime("%d-%m-%y %H:%M:%S")
-            self.general_logger.warning(f'Completed processing for channel: {channel["Name"]}')
+            self.general_logger.warning(f'No videos to download for: {channel["Name"]}')
+            self.finalise_channel(channel, channel_folder_path)
 
         except Exception as e:
             self.general_logger.error(f'Error processing channel {channel["Name"]}: {str(e)}')
-            channel["Last_Synced"] = "Failed"
+            metrics.record_http_error("listing", e)
+            self.update_channel_state(channel, Last_Synced="Failed")
+
+    def download_worker(self, download_queue, postprocess_executor, postprocess_slots):
+        while True:
+            queued_entry = download_queue.get()
+            if queued_entry is None:
+                break
+
+            channel_job, item = queued_entry
+            postprocess_slots.acquire()
+            handed_to_postprocess = False
+            try:
+                with self.download_slots:
+                    if self.link_existing_download(item, channel_job["channel_folder_path"], channel_job["channel"]):
+                        continue
+                    download_result = self.download_item(item, channel_job["channel_folder_path"], channel_job["channel"])
+
+                if download_result:
+                    metrics.inc("channeltube_queue_depth", 1, queue="postprocess")
+                    postprocess_executor.submit(self.postprocess_worker, channel_job, download_result, postprocess_slots)
+                    handed_to_postprocess = True
+
+            except Exception as e:
+                self.general_logger.error(f'Error downloading video: {item["title"]}. Error message: {str(e)}')
+
+            finally:
+                if not handed_to_postprocess:
+                    postprocess_slots.release()
+                    self.complete_channel_job(channel_job)
+
+    def postprocess_worker(self, channel_job, download_result, postprocess_slots):
+        metrics.inc("channeltube_queue_depth", -1, queue="postprocess")
+        try:
+            self.post_process_item(download_result)
 
         finally:
-            socketio.emit("update_channel_list", {"Channel_List": self.req_channel_list})
+            postprocess_slots.release()
+            self.complete_channel_job(channel_job)
+
+    def complete_channel_job(self, channel_job):
+        channel = channel_job["channel"]
+        with channel_job["lock"]:
+            channel_job["remaining"] -= 1
+            channel_downloads_complete = channel_job["remaining"] == 0
+
+        if channel_downloads_complete:
+            self.general_logger.warning(f'Finished downloading videos for channel: {channel["Name"]}')
+            try:
+                channel_job["finalise"](channel, channel_job["channel_folder_path"])
+
+            except Exception as e:
+                self.general_logger.error(f'Error processing channel {channel["Name"]}: {str(e)}')
+                self.update_channel_state(channel, Last_Synced="Failed")
+
+    def finalise_channel(self, channel, channel_folder_path):
+        self.general_logger.warning(f'Clearing Files for: {channel["Name"]}')
+        with metrics.time_stage("cleanup"):
+            self.remove_expired_files(channel, during_sync=True)
+        self.general_logger.warning(f'Finished Clearing Files for channel: {channel["Name"]}')
+
+        self.general_logger.warning(f'Counting Files for: {channel["Name"]}')
+        item_count = self.count_media_files(channel_folder_path)
+        self.general_logger.warning(f'Finished Counting Files for channel: {channel["Name"]}')
+
+        self.update_channel_state(channel, Item_Count=item_count, Last_Synced=datetime.datetime.now().strftime("%d-%m-%y %H:%M:%S"))
+        self.retention_wake_event.set()
+        self.media_server_notifier.notify(channel["Name"])
+        self.general_logger.warning(f'Completed processing for channel: {channel["Name"]}')
+
+    def update_channel_state(self, channel, **fields):
+        with self.channel_lock:
+            changed_fields = {key: value for key, value in fields.items() if channel.get(key) != value}
+            if not changed_fields:
+                return
+
+            channel.update(changed_fields)
+            if any(listed_channel is channel for listed_channel in self.req_channel_list):
+                self.config_store.update_channel(channel)
+        self.channel_update_publisher.publish(channel["Id"], changed_fields)
 
     def add_channel(self):
-        existing_ids = [channel.get("Id", 0) for channel in self.req_channel_list]
-        next_id = max(existing_ids, default=-1) + 1
-        new_channel = {
-            "Id": next_id,
-            "Name": "New Channel",
-            "Link": "https://www.youtube.com/@NewChannel",
-            "Keep_Days": 28,
-            "DL_Days": 14,
-            "Last_Synced": "Never",
-            "Item_Count": 0,
-            "Filter_Title_Text": "",
-            "Negate_Filter": False,
-            "Media_Type": "Video",
-            "Search_Limit": "",
-            "Live_Rule": "Ignore",
-        }
-        self.req_channel_list.append(new_channel)
+        with self.channel_lock:
+            existing_ids = [channel.get("Id", 0) for channel in self.req_channel_list]
+            next_id = max(existing_ids, default=-1) + 1
+            new_channel = self.build_channel_record(
+                {
+                    "Name": "New Channel",
+                    "Link": "https://www.youtube.com/@NewChannel",
+                    "Keep_Days": 28,
+                    "DL_Days": 14,
+                },
+                next_id,
+            )
+            self.config_store.insert_channels([new_channel])
+            self.req_channel_list.append(new_channel)
         socketio.emit("new_channel_added", new_channel)
-        self.save_channel_list_to_file()
+        self.wake_scheduler()
 
     def remove_channel(self, channel_to_be_removed):
-        self.req_channel_list = [channel for channel in self.req_channel_list if channel["Id"] != channel_to_be_removed["Id"]]
-        self.save_channel_list_to_file()
-
-    def sync_media_servers(self):
+        with self.channel_lock:
+            for channel in self.req_channel_list:
+                if channel["Id"] == channel_to_be_removed["Id"]:
+                    self.retry_queue.remove_channel(channel["Link"])
+            self.req_channel_list[:] = [channel for channel in self.req_channel_list if channel["Id"] != channel_to_be_removed["Id"]]
+            self.config_store.delete_channel(channel_to_be_removed["Id"])
+        self.channel_update_publisher.discard(channel_to_be_removed["Id"])
+        socketio.emit("channel_removed", {"Id": channel_to_be_removed["Id"]})
+
+    def configure_media_server_notifier(self):
         media_servers = self.convert_string_to_dict(self.media_server_addresses)
         media_tokens = self.convert_string_to_dict(self.media_server_tokens)
-        if "Plex" in media_servers and "Plex" in media_tokens:
-            try:
-                token = media_tokens.get("Plex")
-                address = media_servers.get("Plex")
-                self.general_logger.warning("Attempting Plex Sync")
-                media_server_server = PlexServer(address, token)
-                library_section = media_server_server.library.section(self.media_server_library_name)
-                library_section.update()
-                self.general_logger.warning(f"Plex Library scan for '{self.media_server_library_name}' started.")
-            except Exception as e:
-                self.general_logger.warning(f"Plex Library scan failed: {str(e)}")
-
-        if "Jellyfin" in media_servers and "Jellyfin" in media_tokens:
-            try:
-                token = media_tokens.get("Jellyfin")
-                address = media_servers.get("Jellyfin")
-                self.general_logger.warning("Attempting Jellyfin Sync")
-                url = f"{address}/Library/Refresh?api_key={token}"
-                response = requests.post(url)
-                if response.status_code == 204:
-                    self.general_logger.warning("Jellyfin Library refresh request successful.")
-                else:
-                    self.general_logger.warning(f"Jellyfin Error: {response.status_code}, {response.text}")
-            except Exception as e:
-                self.general_logger.warning(f"Jellyfin Library scan failed: {str(e)}")
+        self.media_server_notifier.configure(media_servers, media_tokens, self.media_server_library_name)
 
     def string_cleaner(self, input_string):
         if isinstance(input_string, str):
@@ -704,29 +2878,37 @@ class DataHandler:
         self.media_server_addresses = data["media_server_addresses"]
         self.media_server_tokens = data["media_server_tokens"]
         self.media_server_library_name = data["media_server_library_name"]
+        self.configure_media_server_notifier()
+        self.trace_syncs = bool(data.get("trace_syncs", self.trace_syncs))
+        tracer.configure(os.path.join(self.config_folder, "traces"), self.trace_retention, self.trace_syncs)
 
         try:
-            if data["sync_start_times"] == "":
-                self.sync_start_times = []
-            else:
-                raw_sync_start_times = [int(re.sub(r"\D", "", start_time.strip())) for start_time in data["sync_start_times"].split(",")]
-                temp_sync_start_times = [0 if x < 0 or x > 23 else x for x in raw_sync_start_times]
-                cleaned_sync_start_times = sorted(list(set(temp_sync_start_times)))
-                self.sync_start_times = cleaned_sync_start_times
+            self.sync_start_times = parse_sync_schedule(data["sync_start_times"])
 
         except Exception as e:
             self.general_logger.error(f"Error Updating Settings: {str(e)}")
             self.sync_start_times = []
 
         finally:
-            self.general_logger.warning(f"Sync Hours: {str(self.sync_start_times)}")
-            self.save_settings_to_file()
+            self.general_logger.warning(f"Sync Schedule: {format_sync_schedule(self.sync_start_times) or 'None'}")
+            self.save_settings_to_store()
+            self.wake_scheduler()
 
     def save_channel_changes(self, channel_to_be_saved):
         try:
-            for channel in self.req_channel_list:
+            for channel in list(self.req_channel_list):
                 if channel["Id"] == channel_to_be_saved.get("Id"):
-                    channel.update(channel_to_be_saved)
+                    self.channel_feed_monitor.reset(channel["Link"])
+                    if channel_to_be_saved.get("Link", channel["Link"]) != channel["Link"]:
+                        channel_to_be_saved.update({"Channel_Id": "", "Channel_Title": ""})
+                    if channel_to_be_saved.get("Sync_Schedule"):
+                        try:
+                            channel_to_be_saved["Sync_Schedule"] = format_sync_schedule(parse_sync_schedule(channel_to_be_saved["Sync_Schedule"]))
+                        except Exception as e:
+                            self.general_logger.error(f"Invalid sync schedule for channel {channel_to_be_saved.get('Name')}: {str(e)}")
+                            channel_to_be_saved["Sync_Schedule"] = ""
+                    self.update_channel_state(channel, **channel_to_be_saved)
+                    self.retention_wake_event.set()
                     self.general_logger.warning(f"Channel: {channel_to_be_saved.get('Name')} saved.")
                     break
             else:
@@ -736,7 +2918,7 @@ class DataHandler:
             self.general_logger.error(f"Error Saving Channel: {str(e)}")
 
         else:
-            self.save_channel_list_to_file()
+            self.wake_scheduler()
 
     def manual_start(self):
         self.general_logger.warning("Manual sync triggered.")
@@ -745,6 +2927,8 @@ class DataHandler:
         socketio.emit("settings_save_message", "Manual sync initiated.")
 
 
+tracer = SyncTracer()
+metrics = Metrics(tracer)
 app = Flask(__name__)
 app.secret_key = "secret_key"
 socketio = SocketIO(app)
@@ -756,18 +2940,24 @@ def home():
     return render_template("base.html")
 
 
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @socketio.on("connect")
 def connection():
-    socketio.emit("update_channel_list", {"Channel_List": data_handler.req_channel_list})
+    socketio.emit("update_channel_list", {"Channel_List": data_handler.req_channel_list}, to=request.sid)
 
 
 @socketio.on("get_settings")
 def get_settings():
     data = {
-        "sync_start_times": data_handler.sync_start_times,
+        "sync_start_times": format_sync_schedule(data_handler.sync_start_times),
         "media_server_addresses": data_handler.media_server_addresses,
         "media_server_tokens": data_handler.media_server_tokens,
         "media_server_library_name": data_handler.media_server_library_name,
+        "trace_syncs": data_handler.trace_syncs,
     }
     socketio.emit("current_settings", data)
 
@@ -799,5 +2989,10 @@ def manual_start():
     data_handler.manual_start()
 
 
+@socketio.on("clear_failed_downloads")
+def clear_failed_downloads():
+    data_handler.clear_failed_downloads()
+
+
 if __name__ == "__main__":
     socketio.run(app, host="0.0.0.0", port=5000)
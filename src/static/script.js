@@ -1,13 +1,17 @@
 const config_modal = document.getElementById("config-modal");
 const save_changes_button = document.getElementById("save-changes-button");
 const manual_start_button = document.getElementById("manual-start-button");
+const clear_failed_downloads_button = document.getElementById("clear-failed-downloads-button");
 const sync_start_times = document.getElementById("sync-start-times");
 const media_server_addresses = document.getElementById("media-server-addresses");
 const media_server_tokens = document.getElementById("media-server-tokens");
 const media_server_library_name = document.getElementById("media-server-library-name");
+const trace_syncs = document.getElementById("trace-syncs");
 const add_channel = document.getElementById("add-channel");
 const channel_table = document.getElementById("channel-table").querySelector("tbody");
 const modal_channel_template = document.getElementById("modal-channel-template").content;
+const download_progress = document.getElementById("download-progress");
+const download_table = download_progress.querySelector("tbody");
 let channel_list = [];
 const socket = io();
 
@@ -32,20 +36,24 @@ function open_edit_modal(channel_id) {
     const channel_link_input = modal.querySelector("#channel-link");
     const download_days_input = modal.querySelector("#download-days");
     const keep_days_input = modal.querySelector("#keep-days");
+    const quota_gb_input = modal.querySelector("#quota-gb");
     const title_filter_text_input = modal.querySelector("#title-filter-text");
     const negate_filter_checkbox = modal.querySelector("#negate-filter");
     const media_type_selector = modal.querySelectorAll("input[name='media-type-selector']");
     const filter_text_description = modal.querySelector("#filter-text-description");
     const search_limit_input = modal.querySelector("#search-limit");
     const live_rule_selector = modal.querySelectorAll("input[name='live-rule-selector']");
+    const channel_sync_schedule_input = modal.querySelector("#channel-sync-schedule");
 
     channel_name_input.value = channel.Name;
     channel_link_input.value = channel.Link;
     download_days_input.value = channel.DL_Days;
     keep_days_input.value = channel.Keep_Days;
+    quota_gb_input.value = channel.Quota_GB;
     title_filter_text_input.value = channel.Filter_Title_Text;
     negate_filter_checkbox.checked = channel.Negate_Filter;
     search_limit_input.value = channel.Search_Limit;
+    channel_sync_schedule_input.value = channel.Sync_Schedule || "";
 
     change_filter_description(negate_filter_checkbox, filter_text_description);
 
@@ -84,9 +92,7 @@ function add_row_to_channel_table(channel) {
     const row = new_row.querySelector("tr");
 
     row.id = channel.Id;
-    row.querySelector(".channel-name").textContent = channel.Name;
-    row.querySelector(".channel-last-synced").textContent = channel.Last_Synced;
-    row.querySelector(".channel-item-count").textContent = channel.Item_Count;
+    update_channel_row(row, channel);
 
     const edit_button = row.querySelector(".edit-button");
     edit_button.addEventListener("click", function () {
@@ -101,19 +107,28 @@ function add_row_to_channel_table(channel) {
     channel_table.appendChild(row);
 }
 
+function update_channel_row(row, channel) {
+    row.querySelector(".channel-name").textContent = channel.Name;
+    row.querySelector(".channel-last-synced").textContent = channel.Last_Synced;
+    row.querySelector(".channel-item-count").textContent = channel.Item_Count;
+}
+
+function remove_channel_from_table(channel_id) {
+    const index = channel_list.findIndex(c => c.Id === channel_id);
+    if (index > -1) {
+        channel_list.splice(index, 1);
+    }
+    const row = document.getElementById(`${channel_id}`);
+    if (row) {
+        row.remove();
+    }
+}
+
 function remove_channel(channel_to_be_removed) {
     const confirmation = confirm(`Are you sure you want to remove the channel "${channel_to_be_removed.Name}"?`);
     if (confirmation) {
         socket.emit("remove_channel", channel_to_be_removed);
-
-        const index = channel_list.findIndex(c => c.Id === channel_to_be_removed.Id);
-        if (index > -1) {
-            channel_list.splice(index, 1);
-            const row = document.getElementById(`${channel_to_be_removed.Id}`);
-            if (row) {
-                row.remove();
-            }
-        }
+        remove_channel_from_table(channel_to_be_removed.Id);
     }
 }
 
@@ -131,20 +146,22 @@ function save_channel_changes(channel) {
         Link: document.getElementById("channel-link").value,
         DL_Days: parseInt(document.getElementById("download-days").value, 10),
         Keep_Days: parseInt(document.getElementById("keep-days").value, 10),
+        Quota_GB: parseFloat(document.getElementById("quota-gb").value) || 0,
         Filter_Title_Text: document.getElementById("title-filter-text").value,
         Negate_Filter: document.getElementById("negate-filter").checked,
         Media_Type: document.querySelector("input[name='media-type-selector']:checked").value,
         Search_Limit: document.getElementById("search-limit").value,
-        Live_Rule: document.querySelector("input[name='live-rule-selector']:checked").value
+        Live_Rule: document.querySelector("input[name='live-rule-selector']:checked").value,
+        Sync_Schedule: document.getElementById("channel-sync-schedule").value
     };
 
     socket.emit("save_channel_changes", channel_updates);
     const index = channel_list.findIndex(c => c.Id === channel.Id);
     if (index > -1) {
-        channel_list[index] = channel_updates;
+        Object.assign(channel_list[index], channel_updates);
         const row = document.getElementById(channel.Id);
         if (row) {
-            row.querySelector(".channel-name").textContent = channel_updates.Name;
+            update_channel_row(row, channel_list[index]);
         }
     }
 }
@@ -161,12 +178,17 @@ manual_start_button.addEventListener("click", () => {
     socket.emit("manual_start");
 });
 
+clear_failed_downloads_button.addEventListener("click", () => {
+    socket.emit("clear_failed_downloads");
+});
+
 save_changes_button.addEventListener("click", () => {
     socket.emit("save_settings", {
         "sync_start_times": sync_start_times.value,
         "media_server_addresses": media_server_addresses.value,
         "media_server_tokens": media_server_tokens.value,
         "media_server_library_name": media_server_library_name.value,
+        "trace_syncs": trace_syncs.checked,
     });
 });
 
@@ -200,16 +222,84 @@ socket.on("update_channel_list", function (data) {
     });
 });
 
+socket.on("channel_updated", function (channel_update) {
+    const channel = channel_list.find(c => c.Id === channel_update.Id);
+    if (!channel) {
+        return;
+    }
+    Object.assign(channel, channel_update);
+    const row = document.getElementById(`${channel.Id}`);
+    if (row) {
+        update_channel_row(row, channel);
+    }
+});
+
+socket.on("channel_removed", function (data) {
+    remove_channel_from_table(data.Id);
+});
+
 socket.on("new_channel_added", function (new_channel) {
     channel_list.push(new_channel);
     add_row_to_channel_table(new_channel);
 });
 
+function format_bytes(bytes) {
+    if (!bytes) {
+        return "-";
+    }
+    const units = ["B", "KiB", "MiB", "GiB", "TiB"];
+    const exponent = Math.min(Math.floor(Math.log(bytes) / Math.log(1024)), units.length - 1);
+    return `${(bytes / Math.pow(1024, exponent)).toFixed(1)} ${units[exponent]}`;
+}
+
+function format_seconds(seconds) {
+    if (seconds === null || seconds === undefined) {
+        return "-";
+    }
+    const minutes = Math.floor(seconds / 60);
+    return `${minutes}:${String(Math.floor(seconds % 60)).padStart(2, "0")}`;
+}
+
+function update_download_row(row, item) {
+    row.querySelector(".download-title").textContent = `${item.Channel} - ${item.Title}`;
+    row.querySelector(".download-phase").textContent = item.Postprocessor ? `${item.Phase} (${item.Postprocessor})` : item.Phase;
+    if (item.Is_Live) {
+        row.querySelector(".download-amount").textContent = `${format_bytes(item.Downloaded_Bytes)} (fragment ${item.Fragment_Index ?? "-"})`;
+    } else if (item.Total_Bytes) {
+        row.querySelector(".download-amount").textContent = `${(item.Downloaded_Bytes / item.Total_Bytes * 100).toFixed(1)}% of ${format_bytes(item.Total_Bytes)}`;
+    } else {
+        row.querySelector(".download-amount").textContent = format_bytes(item.Downloaded_Bytes);
+    }
+    row.querySelector(".download-speed").textContent = item.Speed ? `${format_bytes(item.Speed)}/s` : "-";
+    row.querySelector(".download-eta").textContent = format_seconds(item.ETA);
+}
+
+socket.on("download_progress", function (data) {
+    data.Items.forEach(item => {
+        let row = document.getElementById(`download-${item.Id}`);
+        if (item.Phase === "Completed" || item.Phase === "Failed") {
+            if (row) {
+                row.remove();
+            }
+            return;
+        }
+        if (!row) {
+            const template = document.getElementById("download-row-template");
+            row = document.importNode(template.content, true).querySelector("tr");
+            row.id = `download-${item.Id}`;
+            download_table.appendChild(row);
+        }
+        update_download_row(row, item);
+    });
+    download_progress.style.display = download_table.rows.length ? "block" : "none";
+});
+
 socket.on("current_settings", function (settings) {
-    sync_start_times.value = settings.sync_start_times.join(", ");
+    sync_start_times.value = settings.sync_start_times;
     media_server_addresses.value = settings.media_server_addresses;
     media_server_tokens.value = settings.media_server_tokens;
     media_server_library_name.value = settings.media_server_library_name;
+    trace_syncs.checked = settings.trace_syncs;
 });
 
 
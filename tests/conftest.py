@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+SRC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+@pytest.fixture(scope="session")
+def channeltube(tmp_path_factory):
+    previous_folder = os.getcwd()
+    previous_background_tasks = os.environ.get("background_tasks")
+    os.chdir(tmp_path_factory.mktemp("channeltube"))
+    os.environ["background_tasks"] = "false"
+    sys.path.insert(0, SRC_FOLDER)
+    try:
+        import ChannelTube
+
+        yield ChannelTube
+    finally:
+        sys.path.remove(SRC_FOLDER)
+        os.chdir(previous_folder)
+        if previous_background_tasks is None:
+            os.environ.pop("background_tasks", None)
+        else:
+            os.environ["background_tasks"] = previous_background_tasks
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+FEED_TEMPLATE = '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015">{}</feed>'
+
+
+class FeedStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FeedStubHandler)
+        self.requests = []
+        self.video_ids = ["video-2", "video-1"]
+        self.etag = '"feed-v1"'
+        self.status = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def feed_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/feeds/videos.xml"
+
+
+class FeedStubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        with self.server.lock:
+            self.server.requests.append({"query": parse_qs(url.query), "if_none_match": self.headers.get("If-None-Match")})
+
+        if self.server.status:
+            self.send_reply(self.server.status)
+        elif self.headers.get("If-None-Match") == self.server.etag:
+            self.send_reply(304)
+        else:
+            entries = "".join(f"<entry><yt:videoId>{video_id}</yt:videoId></entry>" for video_id in self.server.video_ids)
+            self.send_reply(200, FEED_TEMPLATE.format(entries))
+
+    def send_reply(self, status, text=""):
+        payload = text.encode()
+        self.send_response(status)
+        if status == 200:
+            self.send_header("Content-Type", "application/atom+xml")
+            self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stub():
+    server = FeedStub()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def monitor(channeltube, stub, tmp_path):
+    database = channeltube.Database(str(tmp_path / "feeds.db"))
+    return channeltube.ChannelFeedMonitor(database, logging.getLogger("test_channel_feed_monitor"), stub.feed_url, 3600, request_timeout=5)
+
+
+def make_channel(**fields):
+    channel = {"Name": "Channel A", "Link": "https://www.youtube.com/@channel-a", "Live_Rule": "Ignore"}
+    channel.update(fields)
+    return channel
+
+
+def test_unknown_channel_is_not_skipped_and_feed_is_not_requested(monitor, stub):
+    assert monitor.check_feed(make_channel())["unchanged"] is False
+    assert stub.requests == []
+
+
+def test_etag_is_sent_and_not_modified_feed_skips_search(monitor, stub):
+    channel = make_channel()
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+
+    first_snapshot = monitor.check_feed(channel)
+    assert first_snapshot["unchanged"] is False
+    assert first_snapshot["etag"] == '"feed-v1"'
+    assert first_snapshot["newest_video_id"] == "video-2"
+    monitor.record_discovery(channel, first_snapshot, recheck_required=False)
+
+    second_snapshot = monitor.check_feed(channel)
+    assert second_snapshot["unchanged"] is True
+    assert second_snapshot["newest_video_id"] == "video-2"
+    assert [request["if_none_match"] for request in stub.requests] == [None, '"feed-v1"']
+    assert stub.requests[0]["query"] == {"channel_id": ["UCchannel-a"]}
+
+
+def test_new_upload_in_feed_triggers_search(monitor, stub):
+    channel = make_channel()
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+    monitor.record_discovery(channel, monitor.check_feed(channel), recheck_required=False)
+
+    stub.video_ids = ["video-3", "video-2", "video-1"]
+    stub.etag = '"feed-v2"'
+    snapshot = monitor.check_feed(channel)
+
+    assert snapshot["unchanged"] is False
+    assert snapshot["newest_video_id"] == "video-3"
+
+
+def test_recheck_required_forces_search_until_a_clean_discovery(monitor, stub):
+    channel = make_channel()
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+    monitor.record_discovery(channel, monitor.check_feed(channel), recheck_required=True)
+    snapshot = monitor.check_feed(channel)
+    assert snapshot["unchanged"] is False
+
+    monitor.record_discovery(channel, snapshot, recheck_required=False)
+    assert monitor.check_feed(channel)["unchanged"] is True
+
+    monitor.reset(channel["Link"])
+    assert monitor.check_feed(channel)["unchanged"] is False
+
+
+def test_search_is_forced_after_max_skip_time(monitor, stub, monkeypatch, channeltube):
+    channel = make_channel()
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+    monitor.record_discovery(channel, monitor.check_feed(channel), recheck_required=False)
+    assert monitor.check_feed(channel)["unchanged"] is True
+
+    later = time.time() + 3601
+    monkeypatch.setattr(channeltube.time, "time", lambda: later)
+    assert monitor.check_feed(channel)["unchanged"] is False
+
+
+def test_playlist_feed_uses_playlist_id(monitor, stub):
+    channel = make_channel(Link="https://www.youtube.com/playlist?list=PLplaylist")
+    monitor.set_feed_source(channel["Link"], playlist_id="PLplaylist")
+    monitor.record_discovery(channel, monitor.check_feed(channel), recheck_required=False)
+
+    assert monitor.check_feed(channel)["unchanged"] is True
+    assert [request["query"] for request in stub.requests] == [{"playlist_id": ["PLplaylist"]}, {"playlist_id": ["PLplaylist"]}]
+
+
+def test_live_only_channels_always_search(monitor, stub):
+    channel = make_channel(Live_Rule="Only")
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+
+    assert monitor.check_feed(channel)["unchanged"] is False
+    assert stub.requests == []
+
+
+def test_feed_errors_never_skip_search(monitor, stub):
+    channel = make_channel()
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+    monitor.record_discovery(channel, monitor.check_feed(channel), recheck_required=False)
+
+    stub.status = 500
+    assert monitor.check_feed(channel)["unchanged"] is False
+
+
+def test_queued_downloads_keep_the_channel_out_of_feed_skips(channeltube, monitor, stub, monkeypatch):
+    data_handler = channeltube.data_handler
+    channel = make_channel(Id=0, Channel_Id="UCchannel-a", Channel_Title="Channel A", Media_Type="Video", DL_Days=7)
+    monitor.set_feed_source(channel["Link"], channel_id="UCchannel-a")
+    monkeypatch.setattr(data_handler, "channel_feed_monitor", monitor)
+    monkeypatch.setattr(data_handler, "get_list_of_files_from_channel_folder", lambda channel_folder_path: {"id_list": [], "filename_list": []})
+    monkeypatch.setattr(data_handler, "get_list_of_videos_from_youtube", lambda channel, current_channel_files, discovery_report: discovery_report.update(recheck_required=False) or [{"id": "video-2", "title": "Video 2"}])
+    queued_items = []
+    download_queue = type("DownloadQueue", (), {"put": lambda self, key, entry: queued_items.append(entry)})()
+
+    data_handler.sync_channel(channel, download_queue)
+
+    assert len(queued_items) == 1
+    assert monitor.check_feed(channel)["unchanged"] is False
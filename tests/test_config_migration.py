@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+
+import pytest
+
+
+@pytest.fixture
+def data_handler(channeltube, tmp_path, monkeypatch):
+    data_handler = channeltube.data_handler
+    database = channeltube.Database(str(tmp_path / "channeltube.db"))
+    monkeypatch.setattr(data_handler, "config_store", channeltube.ConfigStore(database, logging.getLogger("test_config_migration")))
+    monkeypatch.setattr(data_handler, "settings_config_file", str(tmp_path / "settings_config.json"))
+    monkeypatch.setattr(data_handler, "channel_list_config_file", str(tmp_path / "channel_list.json"))
+    monkeypatch.setattr(data_handler, "req_channel_list", [])
+    for setting_name in ["sync_start_times", "media_server_addresses", "media_server_tokens", "media_server_library_name", "trace_syncs"]:
+        monkeypatch.setattr(data_handler, setting_name, getattr(data_handler, setting_name))
+    return data_handler
+
+
+def write_json(file_path, data):
+    with open(file_path, "w") as json_file:
+        json.dump(data, json_file)
+
+
+def start(data_handler):
+    data_handler.migrate_json_config()
+    data_handler.load_settings()
+    data_handler.load_channel_list()
+
+
+def test_json_config_is_imported_once_and_renamed(data_handler):
+    write_json(data_handler.settings_config_file, {"sync_start_times": [2, 20], "media_server_library_name": "YouTube"})
+    write_json(
+        data_handler.channel_list_config_file,
+        [
+            {"Name": "Zebra", "Link": "https://www.youtube.com/@zebra", "DL_Days": 7, "Last_Synced": "In Progress"},
+            {"Name": "apple", "Link": "https://www.youtube.com/@apple", "Media_Type": "Audio", "Filter_Title_Text": "Podcast"},
+        ],
+    )
+
+    start(data_handler)
+
+    assert not os.path.exists(data_handler.settings_config_file) and os.path.exists(f"{data_handler.settings_config_file}.migrated")
+    assert not os.path.exists(data_handler.channel_list_config_file) and os.path.exists(f"{data_handler.channel_list_config_file}.migrated")
+    assert data_handler.config_store.load_settings() == {"sync_start_times": [2, 20], "media_server_library_name": "YouTube"}
+    assert data_handler.sync_start_times == [2, 20]
+    stored_channels = data_handler.config_store.load_channels()
+    assert [(channel["Id"], channel["Name"], channel["Last_Synced"]) for channel in stored_channels] == [(0, "apple", "Never"), (1, "Zebra", "Incomplete")]
+    assert stored_channels[0]["Media_Type"] == "Audio" and stored_channels[0]["Filter_Title_Text"] == "Podcast"
+    assert stored_channels[1]["DL_Days"] == 7 and stored_channels[1]["Live_Rule"] == "Ignore"
+    assert [channel["Name"] for channel in data_handler.req_channel_list] == ["apple", "Zebra"]
+
+    write_json(data_handler.channel_list_config_file, [{"Name": "Stale", "Link": "https://www.youtube.com/@stale"}])
+    start(data_handler)
+
+    assert data_handler.config_store.load_channels() == stored_channels
+    assert os.path.exists(data_handler.channel_list_config_file)
+    assert [channel["Name"] for channel in data_handler.req_channel_list] == ["apple", "Zebra"]
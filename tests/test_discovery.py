@@ -0,0 +1,119 @@
+import contextlib
+import datetime
+import time
+
+import pytest
+
+
+def make_entry(video_id, days_old, title=None):
+    return {
+        "id": video_id,
+        "title": title or f"Video {video_id}",
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "duration": 600,
+        "timestamp": time.time() - days_old * 86400,
+    }
+
+
+def make_channel(**fields):
+    channel = {"Name": "Channel A", "Link": "https://www.youtube.com/@channel-a", "Channel_Id": "UCchannel-a", "Channel_Title": "Channel A", "DL_Days": 7, "Search_Limit": 0, "Live_Rule": "Ignore", "Filter_Title_Text": "", "Negate_Filter": False}
+    channel.update(fields)
+    return channel
+
+
+class PagedPlaylist:
+    def __init__(self, pages):
+        self.pages = pages
+        self.pages_fetched = 0
+
+    def entries(self):
+        for page in self.pages:
+            self.pages_fetched += 1
+            yield from page
+
+
+class FakeListingYoutubeDL:
+    def __init__(self, playlist):
+        self.playlist = playlist
+        self.requested_urls = []
+
+    def extract_info(self, url, download=False, process=True):
+        self.requested_urls.append(url)
+        return {"_type": "playlist", "title": "Uploads", "entries": self.playlist.entries()}
+
+
+@pytest.fixture
+def data_handler(channeltube):
+    return channeltube.data_handler
+
+
+def get_candidates(data_handler, channel, entries, folder_ids=()):
+    cutoff_date = datetime.datetime.now() - datetime.timedelta(days=channel["DL_Days"])
+    discovery_report = {"extractions_avoided": 0}
+    current_channel_files = {"id_list": list(folder_ids), "filename_list": []}
+    candidates = list(data_handler.get_candidate_videos(channel, entries, current_channel_files, cutoff_date, discovery_report))
+    return [candidate["id"] for candidate in candidates], discovery_report
+
+
+def test_listing_options_request_approximate_dates(data_handler):
+    assert data_handler.get_listing_options()["extractor_args"] == {"youtubetab": {"approximate_date": [""]}}
+
+
+def test_cutoff_is_applied_before_the_title_filter(data_handler):
+    channel = make_channel(Filter_Title_Text="Podcast")
+    entries = iter([make_entry("new-match", 1, "Podcast 2"), make_entry("new-other", 2, "Vlog"), make_entry("old-other", 30, "Vlog"), make_entry("old-match", 31, "Podcast 1")])
+
+    candidate_ids, discovery_report = get_candidates(data_handler, channel, entries)
+
+    assert candidate_ids == ["new-match"]
+    assert discovery_report["extractions_avoided"] == 2
+    assert next(entries)["id"] == "old-match"
+
+
+def test_cutoff_stops_the_walk_at_videos_already_in_the_folder(data_handler):
+    channel = make_channel()
+    entries = iter([make_entry("new", 1), make_entry("old-kept", 30), make_entry("older-kept", 31), make_entry("oldest", 32)])
+
+    candidate_ids, _ = get_candidates(data_handler, channel, entries, folder_ids=["old-kept", "older-kept"])
+
+    assert candidate_ids == ["new"]
+    assert next(entries)["id"] == "older-kept"
+
+
+def test_entries_without_a_listed_date_are_still_candidates(data_handler):
+    channel = make_channel()
+    undated_entry = make_entry("undated", 0)
+    del undated_entry["timestamp"]
+
+    candidate_ids, _ = get_candidates(data_handler, channel, iter([undated_entry, make_entry("old", 30)]))
+
+    assert candidate_ids == ["undated"]
+
+
+def test_streaming_walk_stops_requesting_pages_at_the_cutoff(data_handler, monkeypatch):
+    playlist = PagedPlaylist([[make_entry(f"page{page}-{index}", page * 10 + index) for index in range(3)] for page in range(6)])
+    listing_ydl = FakeListingYoutubeDL(playlist)
+    monkeypatch.setattr(data_handler, "stream_playlists", True)
+    monkeypatch.setattr(data_handler.youtube_dl_pool, "acquire", lambda profile, overrides=None: contextlib.nullcontext(listing_ydl))
+
+    folder_ids = [entry["id"] for page in playlist.pages for entry in page]
+    discovery_report = {}
+    videos = data_handler.get_list_of_videos_from_youtube(make_channel(), {"id_list": folder_ids, "filename_list": []}, discovery_report)
+
+    assert videos == []
+    assert listing_ydl.requested_urls == ["https://www.youtube.com/playlist?list=UUchannel-a"]
+    assert playlist.pages_fetched == 2
+    assert discovery_report["recheck_required"] is False
+
+
+def test_streaming_walk_stops_requesting_pages_at_the_search_limit(data_handler, monkeypatch):
+    playlist = PagedPlaylist([[make_entry(f"page{page}-{index}", 0) for index in range(3)] for page in range(6)])
+    listing_ydl = FakeListingYoutubeDL(playlist)
+    monkeypatch.setattr(data_handler, "stream_playlists", True)
+    monkeypatch.setattr(data_handler.youtube_dl_pool, "acquire", lambda profile, overrides=None: contextlib.nullcontext(listing_ydl))
+
+    folder_ids = [entry["id"] for page in playlist.pages for entry in page]
+    videos = data_handler.get_list_of_videos_from_youtube(make_channel(Search_Limit=4), {"id_list": folder_ids, "filename_list": []})
+
+    assert videos == []
+    assert playlist.pages_fetched == 2
@@ -0,0 +1,116 @@
+import datetime
+import errno
+import os
+import struct
+import time
+
+import pytest
+from mutagen.mp4 import MP4
+
+
+def atom(name, data):
+    return struct.pack(">I4s", 8 + len(data), name) + data
+
+
+def make_mp4(file_path, payload_size=4096):
+    movie_header = atom(b"mvhd", b"\0" * 4 + struct.pack(">IIII", 0, 0, 1000, 5000) + b"\0" * 80)
+    with open(file_path, "wb") as mp4_file:
+        mp4_file.write(atom(b"ftyp", b"M4A \0\0\0\0M4A mp42isom"))
+        mp4_file.write(atom(b"moov", movie_header))
+        mp4_file.write(atom(b"mdat", b"\0" * payload_size))
+
+
+def unsupported_reflink(*args):
+    raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+
+@pytest.fixture
+def data_handler(channeltube, monkeypatch):
+    data_handler = channeltube.data_handler
+    monkeypatch.setattr(data_handler, "link_duplicates", True)
+    monkeypatch.setattr(data_handler, "copy_duplicates", False)
+    monkeypatch.setattr(data_handler.storage_budget, "global_quota_bytes", 0)
+    monkeypatch.setattr(channeltube.fcntl, "ioctl", unsupported_reflink)
+    return data_handler
+
+
+@pytest.fixture
+def source(data_handler, tmp_path, request):
+    source_folder = tmp_path / "Uploader"
+    target_folder = tmp_path / "Collabs"
+    source_folder.mkdir()
+    target_folder.mkdir()
+    video_id = f"video-{request.node.name}"
+    source_path = str(source_folder / "Video.mp4")
+    make_mp4(source_path)
+    downloaded_at = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(days=10)
+    data_handler.add_extra_metadata(source_path, {"id": video_id, "title": "Video", "channel_name": "Uploader"}, "Video", downloaded_at)
+    return {"video_id": video_id, "path": source_path, "target_folder": str(target_folder)}
+
+
+def make_item(source, channel_name):
+    return {"id": source["video_id"], "title": "Video", "link": f'https://www.youtube.com/watch?v={source["video_id"]}', "channel_name": channel_name}
+
+
+def make_channel(name="Collabs", **fields):
+    channel = {"Name": name, "Link": f"https://www.youtube.com/@{name}", "Media_Type": "Video", "Quota_GB": 0}
+    channel.update(fields)
+    return channel
+
+
+def get_index_entry(data_handler, file_path):
+    return data_handler.database.fetch_one("SELECT * FROM media_files WHERE path = ?", (os.path.normpath(file_path),))
+
+
+def test_matching_metadata_is_hardlinked_with_the_link_time(data_handler, source):
+    target_path = os.path.join(source["target_folder"], "Video.mp4")
+    linked_at = time.time()
+
+    assert data_handler.link_existing_download(make_item(source, "Uploader"), source["target_folder"], make_channel()) is True
+
+    assert os.stat(target_path).st_ino == os.stat(source["path"]).st_ino
+    assert get_index_entry(data_handler, target_path)["downloaded_at"] >= int(linked_at)
+    assert get_index_entry(data_handler, source["path"])["downloaded_at"] < linked_at - 9 * 86400
+    assert source["video_id"] not in data_handler.storage_budget.reservations
+
+
+def test_hardlinks_are_admitted_without_library_space(data_handler, source, monkeypatch):
+    monkeypatch.setattr(data_handler.storage_budget, "global_quota_bytes", data_handler.storage_budget.get_usage())
+    reserved_bytes = []
+    monkeypatch.setattr(data_handler.storage_budget, "reserve", lambda reservation_id, folder_path, expected_bytes: reserved_bytes.append(expected_bytes))
+
+    assert data_handler.link_existing_download(make_item(source, "Uploader"), source["target_folder"], make_channel()) is True
+
+    assert reserved_bytes == [0]
+    assert os.path.exists(os.path.join(source["target_folder"], "Video.mp4"))
+    assert data_handler.retry_queue.get_entry(source["video_id"]) is None
+
+
+def test_different_metadata_is_downloaded_again_without_copy_duplicates(data_handler, source):
+    assert data_handler.link_existing_download(make_item(source, "Collabs Playlist"), source["target_folder"], make_channel()) is False
+
+    assert os.listdir(source["target_folder"]) == []
+    assert source["video_id"] not in data_handler.storage_budget.reservations
+
+
+def test_different_metadata_is_copied_and_retagged_with_copy_duplicates(data_handler, source, monkeypatch):
+    monkeypatch.setattr(data_handler, "copy_duplicates", True)
+    target_path = os.path.join(source["target_folder"], "Video.mp4")
+    linked_at = time.time()
+
+    assert data_handler.link_existing_download(make_item(source, "Collabs Playlist"), source["target_folder"], make_channel()) is True
+
+    assert os.stat(target_path).st_ino != os.stat(source["path"]).st_ino
+    assert MP4(target_path).tags["\xa9ART"] == ["Collabs Playlist"]
+    assert MP4(source["path"]).tags["\xa9ART"] == ["Uploader"]
+    assert get_index_entry(data_handler, target_path)["downloaded_at"] >= int(linked_at)
+
+
+def test_channel_quota_still_counts_hardlinks(data_handler, source):
+    channel = make_channel(Quota_GB=1024 / 1024**3)
+
+    assert data_handler.link_existing_download(make_item(source, "Uploader"), source["target_folder"], channel) is True
+
+    assert os.listdir(source["target_folder"]) == []
+    assert data_handler.retry_queue.get_entry(source["video_id"])["error_class"] == "storage_quota"
+    data_handler.retry_queue.record_success(source["video_id"])
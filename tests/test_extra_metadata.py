@@ -0,0 +1,48 @@
+import datetime
+import os
+import struct
+
+import pytest
+from mutagen.mp4 import MP4
+
+
+def atom(name, data):
+    return struct.pack(">I4s", 8 + len(data), name) + data
+
+
+def make_mp4(file_path, payload_size=4096):
+    movie_header = atom(b"mvhd", b"\0" * 4 + struct.pack(">IIII", 0, 0, 1000, 5000) + b"\0" * 80)
+    with open(file_path, "wb") as mp4_file:
+        mp4_file.write(atom(b"ftyp", b"M4A \0\0\0\0M4A mp42isom"))
+        mp4_file.write(atom(b"moov", movie_header))
+        mp4_file.write(atom(b"mdat", b"\0" * payload_size))
+
+
+@pytest.fixture
+def data_handler(channeltube):
+    return channeltube.data_handler
+
+
+def make_tagged_file(data_handler, file_path, item, download_datetime, payload_size):
+    make_mp4(file_path, payload_size)
+    m4_file = MP4(file_path)
+    m4_file.add_tags()
+    for tag, value in data_handler.get_extra_metadata_tags(item, download_datetime).items():
+        if tag != "\xa9pub":
+            m4_file[tag] = value
+    m4_file.save(padding=lambda padding_info: 0)
+
+
+@pytest.mark.parametrize("payload_size", [4096, 2 * 1024 * 1024])
+def test_publisher_tag_is_added_even_when_it_does_not_fit_in_place(data_handler, tmp_path, payload_size):
+    file_path = str(tmp_path / "Video.mp4")
+    item = {"id": f"video-{payload_size}", "title": "Video", "channel_name": "Channel A"}
+    download_datetime = datetime.datetime.now().replace(microsecond=0)
+    make_tagged_file(data_handler, file_path, item, download_datetime, payload_size)
+
+    data_handler.add_extra_metadata(file_path, item, "Video", download_datetime)
+
+    tags = MP4(file_path).tags
+    assert tags["\xa9pub"] == ["Channel A"]
+    assert tags["\xa9cmt"] == [item["id"]]
+    assert data_handler.database.fetch_one("SELECT video_id FROM media_files WHERE path = ?", (os.path.normpath(file_path),))["video_id"] == item["id"]
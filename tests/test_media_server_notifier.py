@@ -0,0 +1,194 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+PLEX_ROOT = '<MediaContainer size="0" friendlyName="stub" machineIdentifier="stub-machine" version="1.40.0.0" myPlex="0"></MediaContainer>'
+PLEX_LIBRARY = '<MediaContainer size="0" title1="Plex Library"></MediaContainer>'
+PLEX_SECTIONS = '<MediaContainer size="1"><Directory key="3" type="movie" title="YouTube" agent="tv.plex.agents.none" scanner="Plex Video Files Scanner"><Location id="1" path="/media/youtube" /></Directory></MediaContainer>'
+
+
+class MediaServerStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MediaServerStubHandler)
+        self.requests = []
+        self.failing_paths = set()
+        self.jellyfin_libraries = [{"Name": "YouTube", "Locations": ["/media/youtube"]}]
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def address(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def get_requests(self, path):
+        with self.lock:
+            return [request for request in self.requests if request["path"] == path]
+
+
+class MediaServerStubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def handle_request(self, method):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        with self.server.lock:
+            self.server.requests.append({"method": method, "path": url.path, "query": parse_qs(url.query), "body": json.loads(body) if body else None})
+
+        if url.path in self.server.failing_paths:
+            self.send_reply(500, "text/plain", "Internal Server Error")
+        elif url.path == "/":
+            self.send_reply(200, "application/xml", PLEX_ROOT)
+        elif url.path == "/library":
+            self.send_reply(200, "application/xml", PLEX_LIBRARY)
+        elif url.path == "/library/sections":
+            self.send_reply(200, "application/xml", PLEX_SECTIONS)
+        elif url.path.startswith("/library/sections/") and url.path.endswith("/refresh"):
+            self.send_reply(200, "application/xml", "<MediaContainer size=\"0\"></MediaContainer>")
+        elif url.path == "/Library/VirtualFolders":
+            self.send_reply(200, "application/json", json.dumps(self.server.jellyfin_libraries))
+        elif url.path in ("/Library/Media/Updated", "/Library/Refresh"):
+            self.send_reply(204)
+        else:
+            self.send_reply(404, "text/plain", "Not Found")
+
+    def send_reply(self, status, content_type=None, text=""):
+        payload = text.encode()
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stub():
+    server = MediaServerStub()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def start_notifier(channeltube, stub, media_servers, debounce_seconds=0.2, max_delay_seconds=2):
+    notifier = channeltube.MediaServerNotifier(logging.getLogger("test_media_server_notifier"), debounce_seconds, max_delay_seconds, request_timeout=5)
+    notifier.configure({name: stub.address for name in media_servers}, {name: "token" for name in media_servers}, "YouTube")
+    threading.Thread(target=notifier.run, daemon=True).start()
+    return notifier
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_notify_without_recorded_change_does_not_refresh(channeltube, stub):
+    notifier = start_notifier(channeltube, stub, ["Jellyfin"])
+    notifier.notify("Channel A")
+
+    time.sleep(0.5)
+    assert stub.requests == []
+
+
+def test_jellyfin_changes_are_coalesced_into_one_refresh(channeltube, stub):
+    notifier = start_notifier(channeltube, stub, ["Jellyfin"])
+    for folder_name in ["Channel A", "Channel B", "Channel A"]:
+        notifier.record_change(folder_name)
+        notifier.notify(folder_name)
+        time.sleep(0.05)
+
+    assert wait_for(lambda: stub.get_requests("/Library/Media/Updated"))
+    time.sleep(0.5)
+    updates = stub.get_requests("/Library/Media/Updated")
+    assert len(updates) == 1
+    assert updates[0]["query"]["api_key"] == ["token"]
+    assert updates[0]["body"]["Updates"] == [
+        {"Path": "/media/youtube/Channel A", "UpdateType": "Modified"},
+        {"Path": "/media/youtube/Channel B", "UpdateType": "Modified"},
+    ]
+
+
+def test_jellyfin_falls_back_to_full_refresh_for_unknown_library(channeltube, stub):
+    stub.jellyfin_libraries = [{"Name": "Movies", "Locations": ["/media/movies"]}]
+    notifier = start_notifier(channeltube, stub, ["Jellyfin"])
+    notifier.record_change("Channel A")
+    notifier.notify("Channel A")
+
+    assert wait_for(lambda: stub.get_requests("/Library/Refresh"))
+    assert stub.get_requests("/Library/Media/Updated") == []
+
+
+def test_plex_refreshes_each_changed_folder_once(channeltube, stub):
+    notifier = start_notifier(channeltube, stub, ["Plex"])
+    for folder_name in ["Channel A", "Channel B", "Channel B"]:
+        notifier.record_change(folder_name)
+        notifier.notify(folder_name)
+
+    assert wait_for(lambda: len(stub.get_requests("/library/sections/3/refresh")) == 2)
+    time.sleep(0.5)
+    refreshed_paths = sorted(request["query"]["path"][0] for request in stub.get_requests("/library/sections/3/refresh"))
+    assert refreshed_paths == ["/media/youtube/Channel A", "/media/youtube/Channel B"]
+
+
+def test_max_delay_bounds_continuous_debounce(channeltube, stub):
+    notifier = start_notifier(channeltube, stub, ["Jellyfin"], debounce_seconds=0.3, max_delay_seconds=0.6)
+    started_at = time.monotonic()
+    while time.monotonic() - started_at < 1.5 and not stub.get_requests("/Library/Media/Updated"):
+        notifier.record_change("Channel A")
+        notifier.notify("Channel A")
+        time.sleep(0.1)
+
+    assert stub.get_requests("/Library/Media/Updated")
+    assert time.monotonic() - started_at < 1.5
+
+
+def test_failures_are_logged_and_later_refreshes_still_run(channeltube, stub, caplog):
+    stub.failing_paths = {"/Library/VirtualFolders", "/library/sections"}
+    notifier = start_notifier(channeltube, stub, ["Plex", "Jellyfin"])
+    with caplog.at_level(logging.WARNING):
+        notifier.record_change("Channel A")
+        notifier.notify("Channel A")
+        assert wait_for(lambda: "Jellyfin Library scan failed" in caplog.text and "Plex Library scan failed" in caplog.text)
+
+    assert notifier.plex_server is None
+    stub.failing_paths = set()
+    notifier.record_change("Channel B")
+    notifier.notify("Channel B")
+
+    assert wait_for(lambda: stub.get_requests("/Library/Media/Updated") and stub.get_requests("/library/sections/3/refresh"))
+    assert stub.get_requests("/Library/Media/Updated")[0]["body"]["Updates"] == [{"Path": "/media/youtube/Channel B", "UpdateType": "Modified"}]
+
+
+def test_jellyfin_error_status_is_logged(channeltube, stub, caplog):
+    stub.failing_paths = {"/Library/Media/Updated"}
+    notifier = start_notifier(channeltube, stub, ["Jellyfin"])
+    with caplog.at_level(logging.WARNING):
+        notifier.record_change("Channel A")
+        notifier.notify("Channel A")
+        assert wait_for(lambda: "Jellyfin Error: 500" in caplog.text)
+
+
+def test_unreachable_server_is_logged(channeltube):
+    notifier = channeltube.MediaServerNotifier(logging.getLogger("test_media_server_notifier"), 0.1, 1, request_timeout=1)
+    logged_messages = []
+    notifier.general_logger = type("Logger", (), {"warning": lambda self, message: logged_messages.append(message)})()
+    notifier.refresh(["Channel A"], {"Jellyfin": "http://127.0.0.1:9"}, {"Jellyfin": "token"}, "YouTube")
+
+    assert any(message.startswith("Jellyfin Library scan failed") for message in logged_messages)
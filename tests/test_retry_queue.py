@@ -0,0 +1,102 @@
+import logging
+import time
+
+import pytest
+
+
+@pytest.fixture
+def retry_queue(channeltube, tmp_path):
+    database = channeltube.Database(str(tmp_path / "retries.db"))
+    return channeltube.RetryQueue(database, logging.getLogger("test_retry_queue"), 4, 60, 3600, 86400)
+
+
+def make_channel(**fields):
+    channel = {"Id": 0, "Name": "Channel A", "Link": "https://www.youtube.com/@channel-a", "Last_Synced": "Never"}
+    channel.update(fields)
+    return channel
+
+
+def make_item(video_id="video-1"):
+    return {"id": video_id, "title": f"Video {video_id}", "link": f"https://www.youtube.com/watch?v={video_id}"}
+
+
+def get_delay(retry_queue, video_id):
+    return retry_queue.get_entry(video_id)["next_attempt_at"] - time.time()
+
+
+@pytest.mark.parametrize(
+    "error_message, error_class",
+    [
+        ("ERROR: [youtube] abc: HTTP Error 429: Too Many Requests", "rate_limited"),
+        ("Sign in to confirm you’re not a bot", "rate_limited"),
+        ("Sign in to confirm your age. This video may be inappropriate for some users.", "age_restricted"),
+        ("ERROR: [youtube] abc: Private video", "unavailable"),
+        ("This live event will begin in a few moments. Join this channel to get access", "unavailable"),
+        ("Read timed out.", "transient"),
+        ("HTTP Error 503: Service Unavailable", "transient"),
+        ("Storage quota for channel A exceeded", "storage_quota"),
+        ("Postprocessing: Conversion failed!", "unknown"),
+    ],
+)
+def test_errors_are_classified(retry_queue, error_message, error_class):
+    assert retry_queue.classify_error(error_message) == error_class
+
+
+def test_delay_doubles_until_the_maximum_and_gives_up_after_max_attempts(retry_queue):
+    delays = []
+    for _ in range(3):
+        retry_queue.record_failure(make_channel(), make_item(), Exception("Read timed out."))
+        delays.append(get_delay(retry_queue, "video-1"))
+
+    assert [round(delay) for delay in delays] == [60, 120, 240]
+    assert retry_queue.get_pending_count() == 1
+
+    retry_queue.record_failure(make_channel(), make_item(), Exception("Read timed out."))
+    entry = retry_queue.get_entry("video-1")
+    assert entry["permanent"] == 1 and entry["attempts"] == 4 and entry["next_attempt_at"] is None
+    assert retry_queue.get_pending_count() == 0
+
+
+def test_rate_limits_wait_longer_and_are_capped(retry_queue):
+    retry_queue.record_failure(make_channel(), make_item(), Exception("HTTP Error 429: Too Many Requests"))
+    assert round(get_delay(retry_queue, "video-1")) == 240
+
+    retry_queue.max_delay_seconds = 100
+    retry_queue.record_failure(make_channel(), make_item(), Exception("HTTP Error 429: Too Many Requests"))
+    assert round(get_delay(retry_queue, "video-1")) == 100
+
+
+def test_unavailable_videos_are_not_retried(retry_queue):
+    retry_queue.record_failure(make_channel(), make_item(), Exception("Video unavailable"))
+
+    assert retry_queue.get_entry("video-1")["permanent"] == 1
+    assert retry_queue.get_due_entries() == []
+    assert retry_queue.clear_permanent_failures() == 1
+    assert retry_queue.get_entry("video-1") is None
+
+
+def test_success_removes_the_entry(retry_queue):
+    retry_queue.record_failure(make_channel(), make_item(), Exception("Read timed out."))
+    retry_queue.record_success("video-1")
+
+    assert retry_queue.get_entry("video-1") is None
+
+
+def test_retries_leave_the_channel_sync_state_alone(channeltube, retry_queue, tmp_path, monkeypatch):
+    data_handler = channeltube.data_handler
+    channel = make_channel(Last_Synced="In Progress")
+    monkeypatch.setattr(data_handler, "req_channel_list", [channel])
+    monkeypatch.setattr(data_handler, "retry_queue", retry_queue)
+    monkeypatch.setattr(data_handler, "get_channel_folder_path", lambda channel: str(tmp_path / channel["Name"]))
+    retry_queue.record_failure(channel, make_item("video-1"), Exception("Read timed out."))
+    retry_queue.record_failure(channel, make_item("video-2"), Exception("Read timed out."))
+    retry_queue.database.execute("UPDATE download_retries SET next_attempt_at = ?", (time.time() - 1,))
+    download_queue = channeltube.RoundRobinQueue()
+
+    data_handler.queue_retries(retry_queue.get_due_entries(), download_queue)
+
+    assert channel["Last_Synced"] == "In Progress"
+    assert len(download_queue) == 2
+    monkeypatch.setattr(data_handler, "active_download_queues", {download_queue, channeltube.RoundRobinQueue()})
+    download_depth = [value for name, labels, value in data_handler.collect_metrics() if name == "channeltube_queue_depth" and labels == {"queue": "download"}]
+    assert download_depth == [2]
@@ -0,0 +1,137 @@
+import logging
+import os
+import time
+
+import pytest
+
+
+@pytest.fixture
+def media_index(channeltube, tmp_path):
+    database = channeltube.Database(str(tmp_path / "media.db"))
+    return channeltube.MediaIndex(database, logging.getLogger("test_storage_quota"))
+
+
+@pytest.fixture
+def folders(tmp_path):
+    folders = {name: str(tmp_path / name) for name in ["A", "B", "Kept"]}
+    for folder_path in folders.values():
+        os.makedirs(folder_path)
+    return folders
+
+
+@pytest.fixture
+def data_handler(channeltube, media_index, monkeypatch):
+    data_handler = channeltube.data_handler
+    monkeypatch.setattr(data_handler, "media_index", media_index)
+    monkeypatch.setattr(data_handler, "storage_budget", channeltube.StorageBudget(media_index, logging.getLogger("test_storage_quota"), 0, "evict"))
+    return data_handler
+
+
+def add_file(media_index, folder_path, name, size, days_old):
+    file_path = os.path.join(folder_path, f"{name}.mp4")
+    with open(file_path, "wb") as media_file:
+        media_file.write(b"\0" * size)
+    media_index.record_file(file_path, name, name, time.time() - days_old * 86400, "Video")
+    return file_path
+
+
+def link_file(media_index, source_path, folder_path, name, days_old):
+    file_path = os.path.join(folder_path, f"{name}.mp4")
+    os.link(source_path, file_path)
+    media_index.record_file(file_path, name, name, time.time() - days_old * 86400, "Video")
+    return file_path
+
+
+def test_hardlinks_count_once_per_scope(media_index, folders):
+    source_path = add_file(media_index, folders["A"], "shared", 1000, 5)
+    link_file(media_index, source_path, folders["B"], "shared-link", 1)
+    add_file(media_index, folders["B"], "own", 300, 2)
+
+    assert media_index.get_total_size() == 1300
+    assert media_index.get_total_size([folders["A"]]) == 1000
+    assert media_index.get_total_size([folders["B"]]) == 1300
+    assert media_index.get_total_size([folders["A"], folders["B"]]) == 1300
+
+
+def test_exclusive_size_ignores_files_linked_outside_the_owners(media_index, folders):
+    source_path = add_file(media_index, folders["A"], "shared", 1000, 5)
+    link_file(media_index, source_path, folders["Kept"], "kept-link", 1)
+    add_file(media_index, folders["A"], "own", 300, 2)
+
+    assert media_index.get_exclusive_size([folders["A"]]) == 300
+    assert media_index.get_exclusive_size([folders["A"]], [folders["A"]]) == 1300
+    assert media_index.get_exclusive_size([folders["A"], folders["Kept"]]) == 1300
+
+
+def test_eviction_candidates_prefer_unlinked_files_oldest_first(media_index, folders):
+    source_path = add_file(media_index, folders["A"], "shared", 1000, 9)
+    link_file(media_index, source_path, folders["B"], "shared-link", 8)
+    add_file(media_index, folders["A"], "newer", 200, 2)
+    add_file(media_index, folders["B"], "older", 300, 4)
+    kept_source_path = add_file(media_index, folders["A"], "kept", 400, 10)
+    link_file(media_index, kept_source_path, folders["Kept"], "kept-link", 10)
+
+    candidates = media_index.get_eviction_candidates([folders["A"], folders["B"]])
+
+    assert [(entry["video_id"], entry["link_count"]) for entry in candidates] == [("older", 1), ("newer", 1), ("shared", 2), ("shared-link", 2)]
+    assert [entry["video_id"] for entry in media_index.get_eviction_candidates([folders["A"]], [folders["A"]])] == ["kept", "shared", "newer"]
+    assert media_index.get_eviction_candidates([]) == []
+
+
+def test_make_room_evicts_unlinked_files_before_shared_ones(data_handler, media_index, folders):
+    source_path = add_file(media_index, folders["A"], "shared", 1000, 9)
+    link_file(media_index, source_path, folders["B"], "shared-link", 8)
+    older_path = add_file(media_index, folders["A"], "older", 300, 4)
+    newer_path = add_file(media_index, folders["B"], "newer", 300, 2)
+
+    data_handler.make_room("library", None, 1700, 200, [folders["A"], folders["B"]])
+
+    assert not os.path.exists(older_path)
+    assert os.path.exists(newer_path) and os.path.exists(source_path)
+    assert media_index.get_total_size() == 1300
+
+
+def test_make_room_frees_shared_files_only_once_all_links_are_gone(data_handler, media_index, folders):
+    source_path = add_file(media_index, folders["A"], "shared", 1000, 9)
+    link_path = link_file(media_index, source_path, folders["B"], "shared-link", 8)
+    newer_path = add_file(media_index, folders["B"], "newer", 300, 2)
+
+    data_handler.make_room("library", None, 1300, 500, [folders["A"], folders["B"]])
+
+    assert not os.path.exists(newer_path)
+    assert not os.path.exists(source_path) and not os.path.exists(link_path)
+    assert media_index.get_total_size() == 0
+
+
+def test_make_room_counts_reservations_and_refuses_when_not_enough_can_be_freed(data_handler, media_index, folders):
+    add_file(media_index, folders["A"], "own", 500, 3)
+    kept_path = add_file(media_index, folders["Kept"], "kept", 500, 9)
+    data_handler.storage_budget.reserve("pending", os.path.normpath(folders["A"]), 400)
+
+    with pytest.raises(Exception, match="Storage quota for library exceeded"):
+        data_handler.make_room("library", None, 1000, 600, [folders["A"]])
+
+    assert os.path.exists(kept_path)
+    assert media_index.get_total_size() == 1000
+
+
+def test_make_room_skips_files_that_cannot_be_removed(data_handler, media_index, folders, monkeypatch):
+    stuck_path = add_file(media_index, folders["A"], "stuck", 300, 9)
+    next_path = add_file(media_index, folders["A"], "next", 300, 5)
+    original_remove_expired_file = data_handler.remove_expired_file
+    monkeypatch.setattr(data_handler, "remove_expired_file", lambda entry, subtitle_filenames, reason: entry["path"] != stuck_path and original_remove_expired_file(entry, subtitle_filenames, reason))
+
+    data_handler.make_room("channel A", [folders["A"]], 600, 100, [folders["A"]])
+
+    assert os.path.exists(stuck_path) and not os.path.exists(next_path)
+    assert [entry["video_id"] for entry in media_index.get_eviction_candidates([folders["A"]])] == ["stuck"]
+
+
+def test_refuse_policy_never_evicts(data_handler, media_index, folders, monkeypatch):
+    own_path = add_file(media_index, folders["A"], "own", 500, 3)
+    monkeypatch.setattr(data_handler.storage_budget, "policy", "refuse")
+
+    with pytest.raises(Exception, match="Storage quota for channel A exceeded"):
+        data_handler.make_room("channel A", [folders["A"]], 600, 200, [folders["A"]])
+
+    assert os.path.exists(own_path)
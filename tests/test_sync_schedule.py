@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+NOW = datetime.datetime(2026, 10, 18, 12, 0)
+
+
+def next_run(channeltube, expression, after=NOW):
+    return channeltube.CronExpression(expression).next_run_time(after)
+
+
+def test_day_of_month_and_weekday_match_either_when_both_are_set(channeltube):
+    assert next_run(channeltube, "0 0 13 * 5") == datetime.datetime(2026, 10, 23, 0, 0)
+    assert next_run(channeltube, "0 0 13 * 5", datetime.datetime(2026, 10, 23, 0, 0)) == datetime.datetime(2026, 10, 30, 0, 0)
+    assert next_run(channeltube, "0 0 1 * 2", datetime.datetime(2026, 10, 28, 0, 0)) == datetime.datetime(2026, 11, 1, 0, 0)
+
+
+def test_wildcard_day_of_month_restricts_to_weekday(channeltube):
+    assert next_run(channeltube, "30 7 * * 1-5") == datetime.datetime(2026, 10, 19, 7, 30)
+    assert next_run(channeltube, "0 0 13 * *") == datetime.datetime(2026, 11, 13, 0, 0)
+
+
+def test_seven_and_zero_are_both_sunday(channeltube):
+    assert next_run(channeltube, "0 9 * * 7") == datetime.datetime(2026, 10, 25, 9, 0)
+    assert next_run(channeltube, "0 9 * * 0") == datetime.datetime(2026, 10, 25, 9, 0)
+    assert next_run(channeltube, "0 9 * * 5-7") == datetime.datetime(2026, 10, 23, 9, 0)
+
+
+def test_february_29_waits_for_the_next_leap_year(channeltube):
+    assert next_run(channeltube, "0 0 29 2 *") == datetime.datetime(2028, 2, 29, 0, 0)
+    assert next_run(channeltube, "0 0 30 2 *") is None
+
+
+def test_steps_and_lists(channeltube):
+    assert next_run(channeltube, "*/15 * * * *", datetime.datetime(2026, 10, 18, 12, 7, 30)) == datetime.datetime(2026, 10, 18, 12, 15)
+    assert next_run(channeltube, "0 5/6 * * *") == datetime.datetime(2026, 10, 18, 17, 0)
+    assert next_run(channeltube, "0 1,13 * * *") == datetime.datetime(2026, 10, 18, 13, 0)
+
+
+@pytest.mark.parametrize("expression", ["61 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "0 0 * * 8", "*/0 * * * *", "0 0 * *"])
+def test_invalid_cron_expressions_are_rejected(channeltube, expression):
+    with pytest.raises(ValueError):
+        channeltube.CronExpression(expression)
+
+
+def test_comma_separated_hours_are_not_cron(channeltube):
+    assert channeltube.parse_sync_schedule("0,6,12,18") == [0, 6, 12, 18]
+    assert channeltube.parse_sync_schedule("1, 2, 3, 4, 5") == [1, 2, 3, 4, 5]
+    assert channeltube.parse_sync_schedule("18, 6, 6") == [6, 18]
+
+
+def test_mixed_schedule_keeps_hours_times_and_cron(channeltube):
+    schedule = channeltube.parse_sync_schedule("6; 30 7 * * 1-5; 18:45, 9:5; 30  7 * * 1-5")
+
+    assert schedule == [6, "30 7 * * 1-5", "18:45", "09:05"]
+    assert channeltube.format_sync_schedule(schedule) == "6, 18:45, 09:05; 30 7 * * 1-5"
+
+
+def test_invalid_start_times_are_rejected(channeltube):
+    with pytest.raises(ValueError):
+        channeltube.parse_sync_schedule("25:00")
+    with pytest.raises(ValueError):
+        channeltube.parse_sync_schedule("0 0 * * 8")